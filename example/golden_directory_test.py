@@ -31,6 +31,28 @@ class TestExample(unittest.TestCase):
         )
         goldie.testing.run_directory_unittest(self, config)
 
+    def test_script_in_process(self):
+        config = goldie.ConfigDirectoryTest(
+            file_filter="data/*.json",
+            config_file_test=goldie.ConfigFileTest(
+                run_configuration=goldie.ConfigRun(
+                    # We call the script's entry point in-process, avoiding the interpreter startup per file.
+                    func="script:run",
+                    input_mode=goldie.InputMode.STDIN,
+                    output_mode=goldie.OutputMode.STDOUT,
+                ),
+                comparison_configuration=goldie.ConfigComparison(
+                    comparison_type=goldie.ComparisonType.JSON,
+                    json_processing_config=goldie.ConfigProcessJson(
+                        replacements=[
+                            goldie.JsonReplacement(path="data.random", value=3),
+                        ],
+                    ),
+                ),
+            ),
+        )
+        goldie.testing.run_directory_unittest(self, config)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,9 +3,9 @@ import random
 import sys
 
 
-def main():
-    # Read all stdin
-    data = sys.stdin.read()
+def run(stdin, stdout, args):
+    # Read all input
+    data = stdin.read()
 
     # Parse the JSON
     parsed = json.loads(data)
@@ -16,7 +16,11 @@ def main():
     parsed["data"]["random"] = random.randint(0, 100)
 
     # Dump the JSON
-    print(json.dumps(parsed))
+    print(json.dumps(parsed), file=stdout)
+
+
+def main():
+    run(sys.stdin, sys.stdout, sys.argv[1:])
 
 
 if __name__ == "__main__":
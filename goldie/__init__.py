@@ -1,6 +1,7 @@
 from .__about__ import __version__
 from .comparison import ComparisonType as ComparisonType
 from .comparison import ConfigCompareJson as ConfigCompareJson
+from .comparison import ConfigCompareJsonl as ConfigCompareJsonl
 from .comparison import ConfigCompareString as ConfigCompareString
 from .comparison import ConfigComparison as ConfigComparison
 from .comparison import ConfigProcessJson as ConfigProcessJson
@@ -8,14 +9,34 @@ from .comparison import ConfigProcessString as ConfigProcessString
 from .comparison import JsonReplacement as JsonReplacement
 from .comparison import JsonRounding as JsonRounding
 from .comparison import RegexReplacement as RegexReplacement
+from .comparison import StringStreamComparer as StringStreamComparer
+from .comparison import collect_differences as collect_differences
 from .comparison import compare as compare
+from .comparison import compare_json as compare_json
+from .comparison import iter_json_differences as iter_json_differences
+from .comparison import iter_jsonl_differences as iter_jsonl_differences
+from .comparison import process as process
 from .diff import Difference as Difference
 from .diff import DiffStyle as DiffStyle
+from .directory import ConfigCompareDirectory as ConfigCompareDirectory
+from .directory import DirectoryComparison as DirectoryComparison
+from .directory import compare_directories as compare_directories
+from .discovery import DiscoveredFile as DiscoveredFile
+from .discovery import DiscoveryResult as DiscoveryResult
+from .discovery import discover as discover
+from .execution import ConfigProfile as ConfigProfile
 from .execution import ConfigRun as ConfigRun
 from .execution import ConfigRunValidation as ConfigRunValidation
+from .execution import ExecutionResult as ExecutionResult
 from .execution import InputMode as InputMode
 from .execution import OutputMode as OutputMode
 from .execution import execute as execute
+from .execution import execute_with_result as execute_with_result
+from .isolation import CloneMode as CloneMode
+from .isolation import ConfigIsolation as ConfigIsolation
+from .tabular import ConfigCompareCsv as ConfigCompareCsv
+from .tabular import CsvTolerance as CsvTolerance
+from .tabular import iter_csv_differences as iter_csv_differences
 from .testing import ConfigDirectoryTest as ConfigDirectoryTest
 from .testing import ConfigFileTest as ConfigFileTest
 from .testing import TestDefinition as TestDefinition
@@ -0,0 +1,118 @@
+import argparse
+import datetime
+import os
+import sys
+
+from goldie import history
+from goldie.performance import format_bytes
+from goldie.watch import Watcher, load_configuration
+
+
+def _format_time(timestamp: float) -> str:
+    """
+    Formats a timestamp (seconds since the epoch) as local time.
+    """
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _history(args: argparse.Namespace):
+    """
+    Runs the history subcommands.
+    """
+    if not args.database:
+        sys.exit("No history database given (use --database or set GOLDIE_HISTORY).")
+
+    if args.history_command == "runs":
+        for run in history.runs(args.database, args.limit):
+            print(
+                f"{run.run_id}  {_format_time(run.timestamp)}  tests: {run.tests}  failures: {run.failures}  "
+                + f"duration: {run.duration:.3f}s"
+            )
+    elif args.history_command == "trend":
+        for entry in history.trend(args.database, args.input_file, args.limit):
+            duration = "-" if entry.duration is None else f"{entry.duration:.3f}s"
+            print(
+                f"{entry.run_id}  {_format_time(entry.timestamp)}  {'pass' if entry.passed else 'FAIL'}  "
+                + f"exit: {entry.exit_code}  duration: {duration}  output: {format_bytes(entry.output_size)}  "
+                + f"memory: {format_bytes(entry.peak_memory)}"
+            )
+    elif args.history_command == "percentiles":
+        for input_file, values in history.percentiles(args.database, args.input_file, tuple(args.quantiles)).items():
+            print(f"{input_file}  " + "  ".join(f"p{q:g}: {v:.3f}s" for q, v in values.items()))
+    elif args.history_command == "slowdowns":
+        for slowdown in history.slowdowns(args.database, args.base_run, args.head_run, args.limit):
+            print(
+                f"{slowdown.input_file}  {slowdown.base_duration:.3f}s -> {slowdown.head_duration:.3f}s  "
+                + f"({slowdown.ratio:.2f}x)"
+            )
+
+
+def _watch(args: argparse.Namespace):
+    """
+    Runs the watch mode.
+    """
+    directory = os.path.abspath(args.root or os.getcwd())
+    configuration, configuration_file = load_configuration(args.config, directory)
+    root_directory = os.path.abspath(args.root) if args.root else os.path.dirname(configuration_file)
+    watcher = Watcher(
+        configuration,
+        root_directory,
+        interactive=args.interactive,
+        configuration_entry_point=args.config,
+    )
+    watcher.watch(args.interval)
+
+
+def main(argv: list[str] = None):
+    """
+    The command line interface of goldie.
+    """
+    parser = argparse.ArgumentParser(prog="python -m goldie", description="goldie command line interface")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # History
+    history_parser = commands.add_parser("history", help="query the run history database")
+    history_parser.add_argument(
+        "--database",
+        default=history.HISTORY_DATABASE,
+        help="the SQLite history database (default: GOLDIE_HISTORY)",
+    )
+    history_commands = history_parser.add_subparsers(dest="history_command", required=True)
+    runs_parser = history_commands.add_parser("runs", help="list the most recent runs")
+    runs_parser.add_argument("--limit", type=int, default=20, help="the maximum number of runs")
+    trend_parser = history_commands.add_parser("trend", help="show the recent results of a test")
+    trend_parser.add_argument("input_file", help="the input file of the test (relative to the test directory)")
+    trend_parser.add_argument("--limit", type=int, default=20, help="the maximum number of results")
+    percentiles_parser = history_commands.add_parser("percentiles", help="show duration percentiles per test")
+    percentiles_parser.add_argument("input_file", nargs="?", help="only show this test")
+    percentiles_parser.add_argument(
+        "--quantiles", type=float, nargs="+", default=[50, 90, 99], help="the percentiles to show"
+    )
+    slowdowns_parser = history_commands.add_parser("slowdowns", help="show the biggest slowdowns between two runs")
+    slowdowns_parser.add_argument("base_run", help="the run to compare against")
+    slowdowns_parser.add_argument("head_run", help="the run to compare")
+    slowdowns_parser.add_argument("--limit", type=int, default=10, help="the maximum number of tests")
+
+    # Watch
+    watch_parser = commands.add_parser("watch", help="rerun the affected tests whenever files change")
+    watch_parser.add_argument(
+        "config", help="the directory test configuration as 'module:attribute' (a ConfigDirectoryTest or a function)"
+    )
+    watch_parser.add_argument(
+        "--root",
+        help="the directory the file filters are relative to (default: the directory of the configuration module)",
+    )
+    watch_parser.add_argument("--interval", type=float, default=0.2, help="the polling interval in seconds")
+    watch_parser.add_argument(
+        "--interactive", action="store_true", help="offer accepting the output of failed tests as new golden files"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "history":
+        _history(args)
+    elif args.command == "watch":
+        _watch(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
+import filecmp
+import io
 import json
+import os
 import re
+import tempfile
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass, field
 from enum import Enum
+from itertools import zip_longest
 from typing import Any
 
 from jflat import flatten, unflatten
 
 from .diff import Difference, DiffStyle, diff_color_code_full, diff_color_code_unified
+from .tabular import ConfigCompareCsv, iter_csv_differences
 
 
 class ComparisonType(Enum):
@@ -18,6 +26,10 @@ class ComparisonType(Enum):
     """Comparison based on JSON."""
     BINARY = "binary"
     """Comparison based on binary files."""
+    CSV = "csv"
+    """Comparison based on CSV/TSV tables."""
+    JSONL = "jsonl"
+    """Comparison based on JSON Lines (NDJSON), record by record."""
     IGNORE = "ignore"
     """Skips the comparison entirely."""
 
@@ -74,6 +86,27 @@ class ConfigCompareJson:
     """Whether additional keys in the actual JSON are allowed."""
     allow_missing_keys: bool = False
     """Whether missing keys in the actual JSON are allowed."""
+    max_differences: int = 100
+    """
+    The maximum number of differences to report individually (None for no limit, 0 for only a summary).
+    Further differences are only counted and summarized by path pattern (e.g., '$.items[*].price').
+    """
+
+
+@dataclass
+class ConfigCompareJsonl:
+    """Configuration for comparing JSON Lines (each record is compared according to the JSON configuration)."""
+
+    key_path: str = None
+    """
+    The JSON path (e.g., '$.id') identifying a record. If given, records are matched by key regardless of their order
+    using a hash index of the golden file. Otherwise, records are compared in order.
+    """
+    max_differences: int = 100
+    """
+    The maximum number of differences to report individually (None for no limit, 0 for only a summary).
+    Further differences are only counted and summarized by path pattern.
+    """
 
 
 @dataclass
@@ -90,6 +123,17 @@ class ConfigCompareString:
 
     diff_style: DiffStyle = DiffStyle.FULL
     """The diff style to use."""
+    context_lines: int = 3
+    """The number of unchanged lines to show around a change."""
+    streaming: bool = False
+    """
+    Whether to process and compare line by line instead of loading whole files into memory. When running tests, the
+    output is compared against the golden file while the command is still running. The diff is limited to a window
+    around the first mismatch. In streaming mode, regex replacements are applied per line, i.e., patterns cannot span
+    multiple lines.
+    """
+    abort_on_mismatch: bool = False
+    """Whether to kill the command on the first mismatching line (streaming mode only)."""
 
 
 @dataclass
@@ -107,6 +151,10 @@ class ConfigComparison:
     """The configuration for processing JSON."""
     json_comparison_config: ConfigCompareJson = field(default_factory=ConfigCompareJson)
     """The configuration for comparing JSON."""
+    csv_comparison_config: ConfigCompareCsv = field(default_factory=ConfigCompareCsv)
+    """The configuration for comparing CSV tables."""
+    jsonl_comparison_config: ConfigCompareJsonl = field(default_factory=ConfigCompareJsonl)
+    """The configuration for comparing JSON Lines (on top of the JSON configurations applied to each record)."""
 
 
 def _parse_json(json_str: str, decoder: any = None) -> tuple[dict, bool, str]:
@@ -186,7 +234,116 @@ def compare_string(
 
     if configuration.diff_style == DiffStyle.FULL:
         return actual == expected, diff_color_code_full(actual, expected)
-    return actual == expected, diff_color_code_unified(actual, expected)
+    return actual == expected, diff_color_code_unified(actual, expected, n=configuration.context_lines)
+
+
+class StringStreamComparer:
+    """
+    Compares string output line by line against a golden file as it arrives.
+    The golden file is read lazily and only a bounded window of lines around the first mismatch is kept for the
+    diff.
+    """
+
+    def __init__(self, golden_file: str, configuration: ConfigComparison):
+        """
+        Initializes the comparer.
+
+        Parameters
+        ----------
+        golden_file : str
+            The golden file to compare against.
+        configuration : ConfigComparison
+            The comparison configuration (string processing is applied per line).
+        """
+        self._golden = open(golden_file)
+        self._processing = configuration.string_processing_config
+        self._configuration = configuration.string_comparison_config
+        self._context = deque(maxlen=self._configuration.context_lines)
+        self._line_number = 0
+        self._mismatch_line = None
+        self._actual = []
+        self._expected = []
+
+    @property
+    def equal(self) -> bool:
+        """Whether all lines seen so far match the golden file."""
+        return self._mismatch_line is None
+
+    def feed(self, line: str) -> bool:
+        """
+        Compares the next line of output against the golden file.
+
+        Parameters
+        ----------
+        line : str
+            The next line of output (including its line break).
+
+        Returns
+        -------
+        bool
+            Whether to keep feeding lines, i.e., False if a mismatch was found and the comparison is configured to
+            abort on it.
+        """
+        if self._processing:
+            line = process_string(line, self._processing)
+        self._line_number += 1
+
+        # Before the first mismatch, only keep the context lines
+        if self._mismatch_line is None:
+            expected = self._golden.readline()
+            if line == expected:
+                self._context.append(line)
+                return True
+            self._mismatch_line = self._line_number
+            self._actual.append(line)
+            if expected:
+                self._expected.append(expected)
+            return not self._configuration.abort_on_mismatch
+
+        # After the first mismatch, collect a bounded window of lines for the diff
+        if len(self._actual) <= self._configuration.context_lines:
+            self._actual.append(line)
+        return True
+
+    def finish(self) -> tuple[bool, str]:
+        """
+        Finishes the comparison after the output is complete.
+
+        Returns
+        -------
+        tuple[bool, str]
+            A tuple with a boolean indicating if the output matches the golden file and the diff.
+        """
+        try:
+            # Any remaining golden line is a mismatch
+            if self._mismatch_line is None:
+                expected = self._golden.readline()
+                if not expected:
+                    return True, "Content is equal."
+                self._mismatch_line = self._line_number + 1
+                self._expected.append(expected)
+
+            # Read the golden lines following the mismatch for context
+            while len(self._expected) <= self._configuration.context_lines:
+                expected = self._golden.readline()
+                if not expected:
+                    break
+                self._expected.append(expected)
+        finally:
+            self.close()
+
+        # Diff the window around the first mismatch
+        context = "".join(self._context)
+        _, diff = compare_string(
+            context + "".join(self._actual),
+            context + "".join(self._expected),
+            self._configuration,
+        )
+        return False, f"First mismatch at line {self._mismatch_line}:\n{diff}"
+
+    def close(self):
+        """Closes the golden file."""
+        self._golden.close()
 
 
 def process_json(
@@ -235,13 +392,13 @@ def process_json(
     return unflatten(actual_flat)
 
 
-def compare_json(
+def iter_json_differences(
     actual: dict,
     expected: dict,
     configuration: ConfigCompareJson,
-) -> tuple[bool, list[Difference]]:
+) -> Iterator[Difference]:
     """
-    Compares two dictionaries according to the comparison configuration."
+    Lazily generates the differences between two dictionaries according to the comparison configuration.
 
     Parameters
     ----------
@@ -254,63 +411,338 @@ def compare_json(
 
     Returns
     -------
-    tuple[bool, list[Difference]]
-        A tuple with a boolean indicating if the dictionaries are equal and a list of differences.
+    Iterator[Difference]
+        The differences in order of the expected paths, followed by additional paths.
     """
 
     # Flatten the dictionaries
     actual_flat = flatten(actual)
     expected_flat = flatten(expected)
+    ignores = set(configuration.ignores)
 
-    # Collect all differences
-    differences = []
-    for path in set(actual_flat.keys()) | set(expected_flat.keys()):
-        if path in configuration.ignores:
+    # Generate all differences
+    for path in dict.fromkeys([*expected_flat, *actual_flat]):
+        if path in ignores:
             continue
-        if path not in actual_flat and not configuration.allow_missing_keys:
+        if path not in actual_flat:
             # MISSING KEY
-            differences.append(
-                Difference(
+            if not configuration.allow_missing_keys:
+                yield Difference(
                     expected=expected_flat[path],
                     actual="",
                     location=path,
                     message="Missing key.",
                 )
-            )
-        elif path not in expected_flat and not configuration.allow_additional_keys:
+        elif path not in expected_flat:
             # ADDITIONAL KEY
-            differences.append(
-                Difference(
+            if not configuration.allow_additional_keys:
+                yield Difference(
                     expected="",
                     actual=actual_flat[path],
                     location=path,
                     message="Additional key.",
                 )
-            )
         elif type(actual_flat[path]) is not type(expected_flat[path]):
             # TYPE
-            differences.append(
-                Difference(
-                    expected=expected_flat[path],
-                    actual=actual_flat[path],
-                    location=path,
-                    message="Difference in type. "
-                    + f"Expected {type(expected_flat[path])}, but got {type(actual_flat[path])}.",
-                )
+            yield Difference(
+                expected=expected_flat[path],
+                actual=actual_flat[path],
+                location=path,
+                message="Difference in type. "
+                + f"Expected {type(expected_flat[path])}, but got {type(actual_flat[path])}.",
             )
         elif actual_flat[path] != expected_flat[path]:
             # SIMPLE EQUALITY
-            differences.append(
-                Difference(
-                    expected=expected_flat[path],
-                    actual=actual_flat[path],
-                    location=path,
-                    message="Difference in value.",
-                )
+            yield Difference(
+                expected=expected_flat[path],
+                actual=actual_flat[path],
+                location=path,
+                message="Difference in value.",
             )
 
-    # Return the result
-    return not differences, differences
+
+def _group_location(location: str) -> str:
+    """
+    Replaces all array indices of a location by wildcards, e.g., '$.items[3].price' becomes '$.items[*].price' and
+    'row=3,col=price' becomes 'row=*,col=price'.
+    """
+    if not location:
+        return location
+    location = re.sub(r"\[(\d+|key=[^\]]*)\]", "[*]", location)
+    return re.sub(r"^row=[^,]*", "row=*", location)
+
+
+def collect_differences(
+    differences: Iterable[Difference],
+    max_differences: int = None,
+) -> tuple[list[Difference], int, str]:
+    """
+    Collects differences up to a limit and summarizes the remaining ones grouped by location pattern.
+
+    Parameters
+    ----------
+    differences : Iterable[Difference]
+        The differences (consumed lazily).
+    max_differences : int, optional
+        The maximum number of differences to keep (None for no limit, 0 for only a summary).
+
+    Returns
+    -------
+    tuple[list[Difference], int, str]
+        The kept differences, the total number of differences and a summary of all differences (empty if none were
+        dropped).
+    """
+
+    kept = []
+    groups = Counter()
+    total = 0
+    for difference in differences:
+        total += 1
+        groups[(_group_location(difference.location), difference.message)] += 1
+        if max_differences is None or len(kept) < max_differences:
+            kept.append(difference)
+
+    # Only summarize if differences were dropped
+    if total == len(kept):
+        return kept, total, ""
+    lines = [f"Showing {len(kept):,} of {total:,} differences. Summary:"]
+    most_common = groups.most_common(max_differences or None)
+    lines.extend(f"{location}: {message} ({count:,} occurrences)" for (location, message), count in most_common)
+    if len(groups) > len(most_common):
+        lines.append(f"... and {len(groups) - len(most_common):,} more groups.")
+    return kept, total, "\n".join(lines)
+
+
+def compare_json(
+    actual: dict,
+    expected: dict,
+    configuration: ConfigCompareJson,
+) -> tuple[bool, list[Difference]]:
+    """
+    Compares two dictionaries according to the comparison configuration."
+
+    Parameters
+    ----------
+    actual : dict
+        The actual dictionary.
+    expected : dict
+        The expected dictionary.
+    configuration : ConfigCompareJson
+        The comparison configuration.
+
+    Returns
+    -------
+    tuple[bool, list[Difference]]
+        A tuple with a boolean indicating if the dictionaries are equal and a list of differences (at most
+        max_differences of the configuration).
+    """
+
+    differences, total, _ = collect_differences(
+        iter_json_differences(actual, expected, configuration),
+        configuration.max_differences,
+    )
+    return total == 0, differences
+
+
+def _iter_jsonl_records(lines: Iterable[str], json_decoder: Any = None) -> Iterator[tuple[int, Any]]:
+    """
+    Parses JSON Lines lazily, skipping blank lines.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        The lines to parse.
+    json_decoder : Any, optional
+        The decoder to use.
+
+    Returns
+    -------
+    Iterator[tuple[int, Any]]
+        The line number (starting at 1) and the parsed record.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        record, parse_ok, parse_error = _parse_json(line, json_decoder)
+        if not parse_ok:
+            raise ValueError(f"Error parsing JSON in line {line_number}: {parse_error}, content: {line}")
+        yield line_number, record
+
+
+def _decode_record(line: bytes, json_decoder: Any = None) -> Any:
+    """
+    Parses a record of a JSON Lines file read in binary mode.
+    """
+    text = line.decode()
+    record, parse_ok, parse_error = _parse_json(text, json_decoder)
+    if not parse_ok:
+        raise ValueError(f"Error parsing JSON: {parse_error}, content: {text}")
+    return record
+
+
+def _jsonl_key(record: Any, key_path: str) -> str:
+    """
+    Returns the key of a record as a string (None if the record has no value at the key path).
+    """
+    value = flatten(record).get(key_path) if isinstance(record, (dict, list)) else None
+    return None if value is None else json.dumps(value)
+
+
+def _prefix_differences(differences: Iterable[Difference], prefix: str) -> Iterator[Difference]:
+    """
+    Prefixes the locations of record differences, e.g., '$.price' becomes '$[3].price' for the prefix '[3]'.
+    """
+    for d in differences:
+        d.location = "$" + prefix + d.location[1:] if d.location and d.location.startswith("$") else prefix
+        yield d
+
+
+def iter_jsonl_differences(
+    actual_file: str,
+    golden_file: str,
+    configuration: ConfigComparison,
+    json_decoder: Any = None,
+) -> Iterator[Difference]:
+    """
+    Lazily generates the differences between two JSON Lines files record by record.
+    Only one record per file (plus the key index of the golden file when matching by key) is held in memory.
+
+    Parameters
+    ----------
+    actual_file : str
+        The actual file.
+    golden_file : str
+        The golden file.
+    configuration : ConfigComparison
+        The comparison configuration.
+    json_decoder : Any, optional
+        The decoder to use.
+
+    Returns
+    -------
+    Iterator[Difference]
+        The differences with locations of the form '$[<index>].path' or '$[key=<key>].path'.
+    """
+    key_path = configuration.jsonl_comparison_config.key_path
+
+    def record_differences(actual: Any, expected: Any, prefix: str) -> Iterator[Difference]:
+        if configuration.json_processing_config:
+            actual = process_json(actual, configuration.json_processing_config)
+        return _prefix_differences(
+            iter_json_differences(actual, expected, configuration.json_comparison_config), prefix
+        )
+
+    # Compare records in order
+    if key_path is None:
+        with open(actual_file) as actual_lines, open(golden_file) as golden_lines:
+            pairs = zip_longest(
+                _iter_jsonl_records(actual_lines, json_decoder), _iter_jsonl_records(golden_lines, json_decoder)
+            )
+            for index, (actual, expected) in enumerate(pairs):
+                if actual is None:
+                    yield Difference(expected=expected[1], actual="", location=f"$[{index}]", message="Missing record.")
+                elif expected is None:
+                    yield Difference(
+                        expected="", actual=actual[1], location=f"$[{index}]", message="Additional record."
+                    )
+                else:
+                    yield from record_differences(actual[1], expected[1], f"[{index}]")
+        return
+
+    # Index the golden records by key (byte offset of their line)
+    index = {}
+    with open(golden_file, "rb") as golden:
+        offset = 0
+        for line in golden:
+            if line.strip():
+                key = _jsonl_key(_decode_record(line, json_decoder), key_path)
+                if key in index:
+                    yield Difference(expected=key, actual="", location=f"$[key={key}]", message="Duplicate key.")
+                else:
+                    index[key] = offset
+            offset += len(line)
+
+    # Match the actual records against the index
+    seen = set()
+    with open(actual_file) as actual_lines, open(golden_file, "rb") as golden:
+        for _, actual in _iter_jsonl_records(actual_lines, json_decoder):
+            key = _jsonl_key(actual, key_path)
+            if key not in index or key in seen:
+                yield Difference(expected="", actual=actual, location=f"$[key={key}]", message="Additional record.")
+                continue
+            seen.add(key)
+            golden.seek(index[key])
+            expected = _decode_record(golden.readline(), json_decoder)
+            yield from record_differences(actual, expected, f"[key={key}]")
+
+    # Report golden records without match (in the order of the golden file)
+    for key in index:
+        if key in seen:
+            continue
+        yield Difference(expected=key, actual="", location=f"$[key={key}]", message="Missing record.")
+
+
+def _rewrite_lines(actual_file: str, transform: Callable[[Iterable[str]], Iterable[str]]):
+    """
+    Rewrites a file in place line by line through a temporary file, i.e., without loading it into memory.
+
+    Parameters
+    ----------
+    actual_file : str
+        The file to rewrite.
+    transform : Callable[[Iterable[str]], Iterable[str]]
+        Lazily maps the lines of the file to the lines to write.
+    """
+    directory = os.path.dirname(os.path.abspath(actual_file))
+    with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as temp, open(actual_file) as f:
+        for line in transform(f):
+            temp.write(line)
+    # Write back into the original file (instead of replacing it) to keep open handles valid
+    with open(temp.name) as source, open(actual_file, "w") as target:
+        for line in source:
+            target.write(line)
+    os.remove(temp.name)
+
+
+def _process_jsonl_file(actual_file: str, configuration: ConfigComparison, json_decoder: Any, json_encoder: Any):
+    """
+    Processes a JSON Lines file in place record by record.
+
+    Parameters
+    ----------
+    actual_file : str
+        The file to process.
+    configuration : ConfigComparison
+        The processing configuration.
+    json_decoder : Any
+        The decoder to use.
+    json_encoder : Any
+        The encoder to use.
+    """
+
+    def transform(lines: Iterable[str]) -> Iterator[str]:
+        if configuration.string_processing_config:
+            lines = (process_string(line, configuration.string_processing_config) for line in lines)
+        for _, record in _iter_jsonl_records(lines, json_decoder):
+            if configuration.json_processing_config:
+                record = process_json(record, configuration.json_processing_config)
+            yield (json_encoder(record) if json_encoder else json.dumps(record)) + "\n"
+
+    _rewrite_lines(actual_file, transform)
+
+
+def _process_string_file(actual_file: str, configuration: ConfigProcessString):
+    """
+    Processes a file in place line by line, i.e., without loading it into memory.
+
+    Parameters
+    ----------
+    actual_file : str
+        The file to process.
+    configuration : ConfigProcessString
+        The processing configuration.
+    """
+    _rewrite_lines(actual_file, lambda lines: (process_string(line, configuration) for line in lines))
 
 
 def process(
@@ -327,6 +759,18 @@ def process(
     if configuration.comparison_type in [ComparisonType.BINARY, ComparisonType.IGNORE]:
         return
 
+    # Process strings line by line, if desired
+    if configuration.comparison_type == ComparisonType.STRING and configuration.string_comparison_config.streaming:
+        if configuration.string_processing_config:
+            _process_string_file(actual_file, configuration.string_processing_config)
+        return
+
+    # Process JSON Lines record by record
+    if configuration.comparison_type == ComparisonType.JSONL:
+        if configuration.string_processing_config or configuration.json_processing_config:
+            _process_jsonl_file(actual_file, configuration, json_decoder, json_encoder)
+        return
+
     # Read the file
     with open(actual_file) as f:
         actual = f.read()
@@ -334,10 +778,12 @@ def process(
     # Process the actual string
     if configuration.string_processing_config:
         actual = process_string(actual, configuration.string_processing_config)
-        if configuration.comparison_type == ComparisonType.STRING:
+        if configuration.comparison_type in [ComparisonType.STRING, ComparisonType.CSV]:
             with open(actual_file, "w") as f:
                 f.write(actual)
             return
+    if configuration.comparison_type in [ComparisonType.STRING, ComparisonType.CSV]:
+        return
 
     # Decode the JSON
     actual_json, parse_ok, parse_error = _parse_json(actual, json_decoder)
@@ -368,13 +814,24 @@ def compare(
 
     # Handle binary comparison
     if configuration.comparison_type == ComparisonType.BINARY:
-        with open(actual_file, "rb") as f:
-            actual = f.read()
-        with open(golden_file, "rb") as f:
-            expected = f.read()
-        equal = actual == expected
+        equal = filecmp.cmp(actual_file, golden_file, shallow=False)
         return equal, "Content is equal." if equal else "Content is not equal.", []
 
+    # Handle streaming string comparison
+    if configuration.comparison_type == ComparisonType.STRING and configuration.string_comparison_config.streaming:
+        comparer = StringStreamComparer(golden_file, configuration)
+        with open(actual_file) as f:
+            for line in f:
+                if not comparer.feed(line):
+                    break
+        equal, diff = comparer.finish()
+        return equal, diff, []
+
+    # Handle JSON Lines comparison
+    if configuration.comparison_type == ComparisonType.JSONL:
+        differences = iter_jsonl_differences(actual_file, golden_file, configuration, json_decoder)
+        return _differences_result(differences, configuration.jsonl_comparison_config.max_differences)
+
     # Read the files
     with open(actual_file) as f:
         actual = f.read()
@@ -390,6 +847,17 @@ def compare(
         equal, diff = compare_string(actual, expected, configuration.string_comparison_config)
         return equal, diff, []
 
+    # Handle CSV comparison (identical content needs no parsing)
+    if configuration.comparison_type == ComparisonType.CSV:
+        if actual == expected:
+            return True, "Content is equal.", []
+        differences = iter_csv_differences(
+            io.StringIO(actual, newline=""),
+            io.StringIO(expected, newline=""),
+            configuration.csv_comparison_config,
+        )
+        return _differences_result(differences, configuration.csv_comparison_config.max_differences)
+
     # Decode the JSON
     if json_decoder:
         actual = json_decoder(actual)
@@ -403,5 +871,18 @@ def compare(
         actual = process_json(actual, configuration.json_processing_config)
 
     # Handle JSON comparison
-    equal, differences = compare_json(actual, expected, configuration.json_comparison_config)
-    return equal, "Content is equal." if equal else "Content is not equal.", differences
+    differences = iter_json_differences(actual, expected, configuration.json_comparison_config)
+    return _differences_result(differences, configuration.json_comparison_config.max_differences)
+
+
+def _differences_result(
+    differences: Iterable[Difference],
+    max_differences: int = None,
+) -> tuple[bool, str, list[Difference]]:
+    """
+    Collects the differences into the result of a comparison.
+    """
+    differences, total, summary = collect_differences(differences, max_differences)
+    if total == 0:
+        return True, "Content is equal.", []
+    return False, "Content is not equal." + (f"\n{summary}" if summary else ""), differences
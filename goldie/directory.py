@@ -0,0 +1,206 @@
+import filecmp
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .comparison import ComparisonType, ConfigComparison, compare, process
+from .diff import Difference
+from .discovery import translate_pattern
+
+
+@dataclass
+class DirectoryComparison:
+    """Defines how to compare the files of an output directory matching a pattern."""
+
+    pattern: str
+    """The glob pattern relative to the output directory (e.g., '**/*.json')."""
+    configuration: ConfigComparison
+    """The configuration for comparing the matching files."""
+
+
+@dataclass
+class ConfigCompareDirectory:
+    """Configuration for comparing an output directory against a golden directory."""
+
+    comparisons: list[DirectoryComparison] = field(default_factory=list)
+    """The comparisons per file pattern. The first matching pattern is used."""
+    default_configuration: ConfigComparison = field(
+        default_factory=lambda: ConfigComparison(comparison_type=ComparisonType.BINARY)
+    )
+    """The configuration for comparing files not matching any pattern."""
+    max_workers: int = None
+    """The maximum number of files to compare concurrently (None for the default of ThreadPoolExecutor)."""
+
+
+def _list_files(directory: str) -> dict[str, str]:
+    """
+    Lists all files below a directory.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to list.
+
+    Returns
+    -------
+    dict[str, str]
+        The full paths of all files keyed by their path relative to the directory (with '/' as separator).
+    """
+    files = {}
+    if not os.path.isdir(directory):
+        return files
+    for dirpath, _, filenames in os.walk(directory):
+        relative_directory = os.path.relpath(dirpath, directory).replace(os.sep, "/")
+        prefix = "" if relative_directory == "." else relative_directory + "/"
+        for filename in filenames:
+            files[prefix + filename] = os.path.join(dirpath, filename)
+    return files
+
+
+def _resolve_configuration(
+    relative_path: str, configuration: ConfigCompareDirectory, patterns: list
+) -> ConfigComparison:
+    """
+    Returns the comparison configuration of the first pattern matching the relative path.
+    """
+    for regex, comparison in zip(patterns, configuration.comparisons):
+        if regex.match(relative_path):
+            return comparison.configuration
+    return configuration.default_configuration
+
+
+def _compare_file(
+    relative_path: str,
+    actual_file: str,
+    golden_file: str,
+    configuration: ConfigComparison,
+) -> list[Difference]:
+    """
+    Compares a single file of the output directory against its golden file.
+
+    Parameters
+    ----------
+    relative_path : str
+        The path of the file relative to the directory.
+    actual_file : str
+        The actual file (processed in place if necessary).
+    golden_file : str
+        The golden file.
+    configuration : ConfigComparison
+        The configuration for comparing the file.
+
+    Returns
+    -------
+    list[Difference]
+        The differences found (empty if equal).
+    """
+    # Prune identical files by size and content first, skipping processing and parsing altogether
+    if filecmp.cmp(actual_file, golden_file, shallow=False):
+        return []
+
+    process(actual_file, configuration)
+    equal, message, differences = compare(actual_file, golden_file, configuration)
+    if equal:
+        return []
+    return [
+        Difference(expected="", actual="", location=relative_path, message=message),
+        *[
+            Difference(
+                expected=d.expected,
+                actual=d.actual,
+                location=f"{relative_path}:{d.location}",
+                message=d.message,
+            )
+            for d in differences
+        ],
+    ]
+
+
+def compare_directories(
+    actual_directory: str,
+    golden_directory: str,
+    configuration: ConfigCompareDirectory,
+) -> tuple[bool, str, list[Difference]]:
+    """
+    Compares an output directory against a golden directory file by file.
+    Identical files are pruned by size and content, the remaining files are processed and compared concurrently.
+
+    Parameters
+    ----------
+    actual_directory : str
+        The output directory (files are processed in place).
+    golden_directory : str
+        The golden directory.
+    configuration : ConfigCompareDirectory
+        The configuration for comparing the directories.
+
+    Returns
+    -------
+    tuple[bool, str, list[Difference]]
+        A tuple with a boolean indicating if the directories are equal, a message and the differences.
+    """
+    actual_files = _list_files(actual_directory)
+    golden_files = _list_files(golden_directory)
+    patterns = [translate_pattern(c.pattern) for c in configuration.comparisons]
+
+    # Resolve the configuration of every file, skipping ignored files altogether
+    configurations = {}
+    for relative_path in actual_files.keys() | golden_files.keys():
+        file_configuration = _resolve_configuration(relative_path, configuration, patterns)
+        if file_configuration.comparison_type != ComparisonType.IGNORE:
+            configurations[relative_path] = file_configuration
+
+    # Collect missing and additional files
+    differences = []
+    for relative_path in sorted(golden_files.keys() - actual_files.keys()):
+        if relative_path in configurations:
+            differences.append(
+                Difference(expected=relative_path, actual="", location=relative_path, message="Missing file.")
+            )
+    for relative_path in sorted(actual_files.keys() - golden_files.keys()):
+        if relative_path in configurations:
+            differences.append(
+                Difference(expected="", actual=relative_path, location=relative_path, message="Additional file.")
+            )
+
+    # Compare the common files concurrently
+    jobs = []
+    for relative_path in sorted(actual_files.keys() & golden_files.keys()):
+        if relative_path in configurations:
+            jobs.append(
+                (relative_path, actual_files[relative_path], golden_files[relative_path], configurations[relative_path])
+            )
+    with ThreadPoolExecutor(max_workers=configuration.max_workers) as executor:
+        for file_differences in executor.map(lambda job: _compare_file(*job), jobs):
+            differences.extend(file_differences)
+
+    if not differences:
+        return True, "Content is equal.", []
+    return False, "Content is not equal.", differences
+
+
+def update_directory(
+    actual_directory: str,
+    golden_directory: str,
+    configuration: ConfigCompareDirectory,
+):
+    """
+    Replaces the golden directory by the processed output directory.
+
+    Parameters
+    ----------
+    actual_directory : str
+        The output directory (files are processed in place).
+    golden_directory : str
+        The golden directory to replace.
+    configuration : ConfigCompareDirectory
+        The configuration for comparing the directories, used for processing the files.
+    """
+    patterns = [translate_pattern(c.pattern) for c in configuration.comparisons]
+    for relative_path, actual_file in _list_files(actual_directory).items():
+        process(actual_file, _resolve_configuration(relative_path, configuration, patterns))
+
+    if os.path.isdir(golden_directory):
+        shutil.rmtree(golden_directory)
+    shutil.copytree(actual_directory, golden_directory)
@@ -0,0 +1,331 @@
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+GOLDEN_SUFFIX = ".golden"
+"""The suffix appended to an input file to get its golden file."""
+GOLDEN_DIRECTORY_SUFFIX = ".golden.d"
+"""The suffix appended to an input file to get its golden directory (for commands writing an output directory)."""
+GOLDEN_BASELINE_SUFFIX = ".golden.perf"
+"""The suffix appended to an input file to get its performance baseline."""
+
+_INDEX_VERSION = 2
+"""The version of the discovery index format. Indices of other versions are discarded."""
+
+_MTIME_SAFETY_NS = 2_000_000_000
+"""
+Directories modified more recently than this are not trusted in the index, since further changes within the same
+timestamp granularity would go unnoticed.
+"""
+
+
+@dataclass
+class DiscoveredFile:
+    """An input file found by the discovery."""
+
+    input_file: str
+    """The path to the input file."""
+    golden_file: str = None
+    """The path to the golden file (or golden directory, if the test only has one), if it exists."""
+    size: int = 0
+    """The size of the input file in bytes (as of the last scan of its directory)."""
+    mtime_ns: int = 0
+    """The modification time of the input file in nanoseconds (as of the last scan of its directory)."""
+
+
+@dataclass
+class DiscoveryResult:
+    """The result of discovering test files."""
+
+    files: list[DiscoveredFile] = field(default_factory=list)
+    """The input files matching the filters, sorted by path."""
+    orphaned_goldens: list[str] = field(default_factory=list)
+    """Golden files and directories whose input file matches the filters but does not exist."""
+
+    @property
+    def input_files(self) -> list[str]:
+        """The paths of all discovered input files."""
+        return [f.input_file for f in self.files]
+
+    @property
+    def missing_goldens(self) -> list[str]:
+        """The paths of all discovered input files without a golden file or directory."""
+        return [f.input_file for f in self.files if f.golden_file is None]
+
+
+def _translate_segment(segment: str) -> str:
+    """
+    Translates a single path segment of a glob pattern to a regex.
+
+    Parameters
+    ----------
+    segment : str
+        The path segment (must not contain a separator).
+
+    Returns
+    -------
+    str
+        The regex matching the segment.
+    """
+    # Like glob, wildcards do not match hidden names
+    result = "(?!\\.)" if segment[:1] in "*?[" else ""
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        i += 1
+        if c == "*":
+            result += "[^/]*"
+        elif c == "?":
+            result += "[^/]"
+        elif c == "[":
+            end = segment.find("]", i + 1 if segment[i : i + 1] in ["!", "]"] else i)
+            if end < 0:
+                result += "\\["
+                continue
+            chars = segment[i:end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            result += f"[{chars}]"
+            i = end + 1
+        else:
+            result += re.escape(c)
+    return result
+
+
+def translate_pattern(pattern: str) -> re.Pattern:
+    """
+    Translates a glob pattern to a compiled regex matching relative paths (with '/' as separator).
+    Supports '*', '?', '[...]' and '**' for matching any number of directories.
+
+    Parameters
+    ----------
+    pattern : str
+        The glob pattern.
+
+    Returns
+    -------
+    re.Pattern
+        The compiled regex.
+    """
+    segments = pattern.replace(os.sep, "/").strip("/").split("/")
+    regex = ""
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            regex += "(?:(?!\\.)[^/]+/)*(?!\\.)[^/]+" if last else "(?:(?!\\.)[^/]+/)*"
+        else:
+            regex += _translate_segment(segment) + ("" if last else "/")
+    return re.compile(regex + "\\Z", re.DOTALL)
+
+
+def _pattern_scope(pattern: str) -> tuple[str, int, bool]:
+    """
+    Determines the directory to walk for a pattern, how deep to walk and whether to walk hidden directories.
+
+    Parameters
+    ----------
+    pattern : str
+        The glob pattern.
+
+    Returns
+    -------
+    tuple[str, int, bool]
+        The relative base directory ('' for the root), the maximum depth below it (-1 for unlimited) and whether
+        hidden directories below it can match (only if named explicitly, since wildcards do not match them).
+    """
+    segments = pattern.replace(os.sep, "/").strip("/").split("/")
+    base = []
+    for segment in segments[:-1]:
+        if any(c in segment for c in "*?["):
+            break
+        base.append(segment)
+    remaining = segments[len(base) :]
+    depth = -1 if "**" in remaining else len(remaining) - 1
+    hidden = any(segment.startswith(".") for segment in remaining[:-1])
+    return "/".join(base), depth, hidden
+
+
+def _relative_pattern(pattern: str, root_directory: str) -> str:
+    """
+    Makes an absolute pattern relative to the root directory (patterns outside of it start with '..').
+    Relative patterns are returned as is.
+    """
+    if not os.path.isabs(pattern):
+        return pattern
+    return os.path.relpath(pattern, root_directory)
+
+
+class _Index:
+    """The on-disk cache of directory listings, keyed by relative directory path."""
+
+    def __init__(self, root_directory: str, index_file: str = None, cache: dict = None):
+        self.root_directory = root_directory
+        self.index_file = index_file
+        self.cache = cache
+        self.directories = {}
+        self.visited = {}
+        self.changed = False
+        if cache:
+            self.directories = cache
+        elif index_file and os.path.isfile(index_file):
+            try:
+                with open(index_file) as f:
+                    data = json.load(f)
+                if data.get("version") == _INDEX_VERSION and data.get("root") == root_directory:
+                    self.directories = data["directories"]
+            except (OSError, ValueError, KeyError):
+                self.directories = {}
+
+    def listing(self, relative_directory: str) -> dict:
+        """
+        Returns the listing of a directory, rescanning it only if its mtime changed.
+
+        Parameters
+        ----------
+        relative_directory : str
+            The directory relative to the root ('' for the root).
+
+        Returns
+        -------
+        dict
+            The listing with the keys 'files' (name -> [size, mtime_ns]), 'dirs' (list of names) and 'golden_dirs'
+            (list of names of golden directories, which are not walked).
+        """
+        if relative_directory in self.visited:
+            return self.visited[relative_directory]
+        path = os.path.join(self.root_directory, relative_directory)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self.directories.get(relative_directory)
+        if cached is None or cached["mtime_ns"] != mtime_ns:
+            files, dirs, golden_dirs = {}, [], []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            if entry.name.endswith(GOLDEN_DIRECTORY_SUFFIX):
+                                golden_dirs.append(entry.name)
+                            else:
+                                dirs.append(entry.name)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+                    except OSError:
+                        continue
+            # Do not trust recently modified directories in subsequent runs
+            if time.time_ns() - mtime_ns < _MTIME_SAFETY_NS:
+                mtime_ns = -1
+            cached = {"mtime_ns": mtime_ns, "files": files, "dirs": sorted(dirs), "golden_dirs": sorted(golden_dirs)}
+            self.changed = True
+
+        self.visited[relative_directory] = cached
+        return cached
+
+    def save(self):
+        """Writes the index back to disk (and the cache), dropping directories that were not visited."""
+        if self.cache is not None:
+            self.cache.clear()
+            self.cache.update(self.visited)
+        if not self.index_file or (not self.changed and self.visited.keys() == self.directories.keys()):
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_file)), exist_ok=True)
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(
+                {"version": _INDEX_VERSION, "root": self.root_directory, "directories": self.visited},
+                f,
+            )
+        os.replace(temp_file, self.index_file)
+
+
+def discover(
+    root_directory: str,
+    include: list[str],
+    exclude: list[str] = None,
+    index_file: str = None,
+    cache: dict = None,
+) -> DiscoveryResult:
+    """
+    Discovers the input files matching the given patterns along with their golden files.
+
+    Parameters
+    ----------
+    root_directory : str
+        The directory the patterns are relative to.
+    include : list[str]
+        Glob patterns of input files to include (relative to the root directory or absolute). '**' matches any number
+        of directories.
+    exclude : list[str], optional
+        Glob patterns of input files to exclude.
+    index_file : str, optional
+        Path to a discovery index caching the directory listings. Directories whose mtime did not change since the
+        last run are not listed again.
+    cache : dict, optional
+        An in-memory cache of the directory listings to reuse between calls with the same root directory (e.g., when
+        polling for changes). It takes precedence over the index file once filled.
+
+    Returns
+    -------
+    DiscoveryResult
+        The discovered files and orphaned golden files.
+    """
+    include = [_relative_pattern(p, root_directory) for p in include]
+    exclude = [_relative_pattern(p, root_directory) for p in exclude or []]
+    include_regexes = [translate_pattern(p) for p in include]
+    exclude_regexes = [translate_pattern(p) for p in exclude]
+    index = _Index(root_directory, index_file, cache)
+
+    def matches(relative_path: str) -> bool:
+        return any(r.match(relative_path) for r in include_regexes) and not any(
+            r.match(relative_path) for r in exclude_regexes
+        )
+
+    # Walk the scopes of all patterns, sharing listings between overlapping scopes
+    files = {}
+    goldens = {}
+    for pattern in include:
+        base, max_depth, hidden = _pattern_scope(pattern)
+        stack = [(base, 0)]
+        while stack:
+            relative_directory, depth = stack.pop()
+            listing = index.listing(relative_directory)
+            if listing is None:
+                continue
+            prefix = relative_directory + "/" if relative_directory else ""
+            for name, (size, mtime_ns) in listing["files"].items():
+                relative_path = prefix + name
+                if name.endswith(GOLDEN_SUFFIX):
+                    goldens[relative_path[: -len(GOLDEN_SUFFIX)]] = relative_path
+                elif name.endswith(GOLDEN_BASELINE_SUFFIX):
+                    continue
+                elif relative_path not in files and matches(relative_path):
+                    files[relative_path] = (size, mtime_ns)
+            # Golden directories count as goldens, unless there is a golden file as well
+            for name in listing["golden_dirs"]:
+                goldens.setdefault(prefix + name[: -len(GOLDEN_DIRECTORY_SUFFIX)], prefix + name)
+            if max_depth < 0 or depth < max_depth:
+                stack.extend((prefix + name, depth + 1) for name in listing["dirs"] if hidden or name[:1] != ".")
+    index.save()
+
+    # Pair inputs with their goldens and collect orphaned goldens
+    result = DiscoveryResult()
+    for relative_path in sorted(files):
+        size, mtime_ns = files[relative_path]
+        golden = goldens.get(relative_path)
+        result.files.append(
+            DiscoveredFile(
+                input_file=os.path.normpath(os.path.join(root_directory, relative_path)),
+                golden_file=os.path.normpath(os.path.join(root_directory, golden)) if golden else None,
+                size=size,
+                mtime_ns=mtime_ns,
+            )
+        )
+    for relative_path in sorted(goldens):
+        if relative_path not in files and matches(relative_path):
+            result.orphaned_goldens.append(os.path.normpath(os.path.join(root_directory, goldens[relative_path])))
+    return result
@@ -1,6 +1,18 @@
-import subprocess
-from dataclasses import dataclass
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from enum import Enum
+from typing import Any, Callable, Union
+
+from .isolation import ConfigIsolation
+from .launcher import LaunchedProcess, launch
 
 
 class InputMode(Enum):
@@ -21,17 +33,49 @@ class OutputMode(Enum):
     """Does not intercept anything, i.e., ignores the output."""
 
 
+@dataclass
+class ConfigProfile:
+    """
+    Configuration for capturing profiles of slow or failing commands.
+    Such commands are rerun under a profiler after the test, so the measurements of the test itself are not affected.
+    """
+
+    min_duration: float = None
+    """Profile tests whose command took at least this many seconds (None for only profiling failing tests)."""
+    on_failure: bool = True
+    """Whether to profile failing tests."""
+    wrapper: list[str] = None
+    """
+    The command to prefix non-Python commands with for profiling (e.g., ['perf', 'record', '-g', '-o', '{profile}']).
+    Use the string "{profile}" as a placeholder for the path of the profile. Python commands and callables are
+    profiled with cProfile without a wrapper.
+    """
+    report: list[str] = None
+    """
+    The command printing a summary of a profile recorded by the wrapper
+    (e.g., ['perf', 'report', '--stdio', '-i', '{profile}']).
+    """
+    directory: str = ".goldie/profiles"
+    """The directory (relative to the test directory) to store the profiles in, grouped by run identifier."""
+    top: int = 15
+    """The number of functions (or lines of the report) to show in the summary."""
+    sort: str = "cumulative"
+    """The key to sort cProfile statistics by (see pstats.Stats.sort_stats)."""
+
+
 @dataclass
 class ConfigRun:
     """Configuration for running a command."""
 
-    cmd: str
-    """The command to run."""
-    args: list[str]
+    cmd: str = None
+    """The command to run (not needed if func is given)."""
+    args: list[str] = field(default_factory=list)
     """
     The arguments to pass to the command.
     If the path to the input file is needed (instead of feeding via stdin), use the string "{input}" as a placeholder.
     If the path to the output file is needed (instead of reading stdout), use the string "{output}" as a placeholder.
+    If the command writes a directory of outputs, use the string "{output_dir}" as a placeholder for an (empty)
+    output directory. It is compared against a golden directory next to the input file.
     If there are further placeholders, use the string "{name}" as a placeholder and provide the values in the test
     definition.
     """
@@ -44,6 +88,31 @@ class ConfigRun:
     """The input mode."""
     output_mode: OutputMode = OutputMode.STDOUT
     """The output mode."""
+    func: Union[Callable, str] = None
+    """
+    A Python callable (or a 'module:function' entry point, importable from the run directory or the
+    fixture of isolated tests) to invoke instead of
+    running cmd, which avoids the interpreter startup per test. It is called as func(stdin, stdout, args) with the
+    input stream (empty for InputMode.NONE), the output stream and the formatted args. sys.stdin, sys.stdout and
+    sys.stderr are redirected according to the input and output modes for the duration of the call. The return value
+    is used as the exit code (None meaning 0), as is the code of a SystemExit. Other values are written to stderr and
+    result in exit code 1, as do uncaught exceptions (with the traceback written to stderr).
+    Since the working directory and the streams are process-global, in-process calls must not run concurrently (use
+    isolate to run them in the worker process instead).
+    """
+    isolate: bool = False
+    """
+    Whether to invoke func in a pre-warmed worker process instead of in-process. The worker is reused across tests,
+    i.e., imports are only paid once. func needs to be an entry point string or a picklable (module-level) callable.
+    """
+    profile: ConfigProfile = None
+    """The configuration for profiling slow or failing commands (None for no profiling)."""
+    isolation: ConfigIsolation = None
+    """
+    The configuration for running each test in its own working directory cloned from a fixture (None for running
+    all tests in cwd). The working directory replaces cwd, so commands writing scratch files can run concurrently
+    (in-process callables cannot, as they switch the process-wide working directory).
+    """
 
 
 @dataclass
@@ -54,6 +123,37 @@ class ConfigRunValidation:
     """Whether to validate the exit code of the command."""
     expected_exit_code: int = 0
     """The desired exit code of the command."""
+    max_duration: float = None
+    """The maximum duration of the command in seconds."""
+    max_peak_memory: int = None
+    """The maximum peak resident set size of the command in bytes (only checked where it can be measured)."""
+    max_duration_ratio: float = None
+    """
+    The maximum duration relative to the baseline recorded next to the golden file (e.g., 1.5 for 50% slower).
+    The baseline is recorded when updating the golden files.
+    """
+    max_peak_memory_ratio: float = None
+    """The maximum peak memory relative to the baseline recorded next to the golden file."""
+    repetitions: int = 1
+    """How often to run the command for measuring it against the budgets (to damp noise)."""
+    budget_percentile: float = 50
+    """The percentile of the repeated measurements to check against the budgets (50 is the median)."""
+
+
+@dataclass
+class ExecutionResult:
+    """The result of running a command."""
+
+    exit_code: int
+    """The exit code of the command."""
+    aborted: bool = False
+    """Whether the command was killed early because the line callback requested it."""
+    duration: float = None
+    """The wall-clock duration of the command in seconds."""
+    peak_memory: int = None
+    """The peak resident set size of the command in bytes (if available, i.e., for commands on POSIX systems)."""
+    output_size: int = None
+    """The size of the output file in bytes."""
 
 
 def execute(
@@ -62,6 +162,7 @@ def execute(
     cwd: str,
     configuration: ConfigRun,
     extra_args: list[tuple[str, str]] = None,
+    output_dir: str = None,
 ) -> int:
     """
     Run the command with the input file and return the result.
@@ -79,31 +180,409 @@ def execute(
     extra_args : list[tuple[str, str]], optional
         Extra arguments to pass to the command. Each tuple should contain the placeholder
         (needs to match the one in args of configuration) and the value.
+    output_dir : str, optional
+        The directory the command writes its output files to (replaces the "{output_dir}" placeholder).
 
     Returns
     -------
     int
         The exit code of the command.
     """
+    return execute_with_result(input_file, output_file, cwd, configuration, extra_args, output_dir=output_dir).exit_code
+
+
+def execute_with_result(
+    input_file: str,
+    output_file: str,
+    cwd: str,
+    configuration: ConfigRun,
+    extra_args: list[tuple[str, str]] = None,
+    line_callback: Callable[[str], bool] = None,
+    output_dir: str = None,
+) -> ExecutionResult:
+    """
+    Run the command with the input file and return a detailed result.
+
+    Parameters
+    ----------
+    input_file : str
+        The file to read the input from.
+    output_file : str
+        The file to write the output to.
+    cwd : str
+        The directory to run the command in.
+    configuration : ConfigRun
+        The configuration for running the command.
+    extra_args : list[tuple[str, str]], optional
+        Extra arguments to pass to the command. Each tuple should contain the placeholder
+        (needs to match the one in args of configuration) and the value.
+    line_callback : Callable[[str], bool], optional
+        If given, the intercepted output is piped through this callback line by line while the command is still
+        running. The callback returns False to kill the command early. Ignored for OutputMode.NONE.
+    output_dir : str, optional
+        The directory the command writes its output files to (replaces the "{output_dir}" placeholder).
+
+    Returns
+    -------
+    ExecutionResult
+        The result of the command.
+    """
     # Initialize the extra arguments if necessary
     extra_args = extra_args or []
     # Replace the placeholders in the arguments
-    args = [arg.format(input=input_file, output=output_file, **dict(extra_args)) for arg in configuration.args]
-
-    # Run the command
-    with open(output_file, "w") as f:
-        input_file = None if configuration.input_mode == InputMode.NONE else open(input_file)
-        process = subprocess.run(
-            [configuration.cmd, *args],
-            stdin=input_file if configuration.input_mode == InputMode.STDIN else None,
-            stdout=f if configuration.output_mode in [OutputMode.STDOUT, OutputMode.BOTH] else None,
-            stderr=f if configuration.output_mode in [OutputMode.STDERR, OutputMode.BOTH] else None,
-            cwd=cwd if configuration.cwd is None else configuration.cwd,
+    args = [
+        arg.format(input=input_file, output=output_file, output_dir=output_dir, **dict(extra_args))
+        for arg in configuration.args
+    ]
+    module_directory = entry_point_directory(cwd, configuration)
+    cwd = cwd if configuration.cwd is None else configuration.cwd
+
+    start = time.perf_counter()
+
+    # Invoke Python callables directly
+    if configuration.func is not None:
+        result = _execute_callable(input_file, output_file, cwd, args, configuration, line_callback, module_directory)
+    else:
+        # Run the command
+        with open(output_file, "w") as f:
+            input_file = None if configuration.input_mode == InputMode.NONE else open(input_file)
+            try:
+                stdin = input_file if configuration.input_mode == InputMode.STDIN else None
+                if line_callback is not None and configuration.output_mode != OutputMode.NONE:
+                    result = _execute_streaming([configuration.cmd, *args], stdin, f, cwd, configuration, line_callback)
+                else:
+                    process = launch(
+                        [configuration.cmd, *args],
+                        cwd=cwd,
+                        stdin=None if stdin is None else stdin.fileno(),
+                        stdout=f.fileno()
+                        if configuration.output_mode in [OutputMode.STDOUT, OutputMode.BOTH]
+                        else None,
+                        stderr=f.fileno()
+                        if configuration.output_mode in [OutputMode.STDERR, OutputMode.BOTH]
+                        else None,
+                    )
+                    exit_code, peak_memory = _wait(process)
+                    result = ExecutionResult(exit_code=exit_code, peak_memory=peak_memory)
+            finally:
+                # Close the input file if necessary
+                if input_file is not None:
+                    input_file.close()
+
+    # Add the measurements and return the result
+    result.duration = time.perf_counter() - start
+    result.output_size = os.path.getsize(output_file)
+    return result
+
+
+def _wait(process: LaunchedProcess) -> tuple[int, int]:
+    """
+    Waits for the process to finish and returns its exit code and peak resident set size in bytes.
+    The peak memory is only available where the launcher is supported (POSIX), None otherwise.
+    The process is killed if waiting is interrupted.
+
+    Parameters
+    ----------
+    process : LaunchedProcess
+        The process to wait for.
+
+    Returns
+    -------
+    tuple[int, int]
+        The exit code and the peak resident set size in bytes.
+    """
+    try:
+        return process.wait()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+
+
+def _execute_streaming(
+    command: list[str],
+    stdin: any,
+    output: any,
+    cwd: str,
+    configuration: ConfigRun,
+    line_callback: Callable[[str], bool],
+) -> ExecutionResult:
+    """
+    Run the command while piping the intercepted output through the line callback.
+
+    Parameters
+    ----------
+    command : list[str]
+        The command and its arguments.
+    stdin : any
+        The file to feed via stdin, if any.
+    output : any
+        The open output file. Every line is written to it before being handed to the callback.
+    cwd : str
+        The directory to run the command in.
+    configuration : ConfigRun
+        The configuration for running the command.
+    line_callback : Callable[[str], bool]
+        The callback receiving each line. Returning False kills the command.
+
+    Returns
+    -------
+    ExecutionResult
+        The result of the command.
+    """
+    # Pipe the intercepted stream (merge stderr into stdout when intercepting both)
+    pipe_stderr = configuration.output_mode == OutputMode.STDERR
+    read_fd, write_fd = os.pipe()
+    try:
+        process = launch(
+            command,
+            cwd=cwd,
+            stdin=None if stdin is None else stdin.fileno(),
+            stdout=None if pipe_stderr else write_fd,
+            stderr=write_fd if configuration.output_mode in [OutputMode.STDERR, OutputMode.BOTH] else None,
         )
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    stream = open(read_fd)
+
+    aborted = False
+    try:
+        with stream:
+            for line in stream:
+                output.write(line)
+                if not line_callback(line):
+                    aborted = True
+                    process.kill()
+                    break
+    except BaseException:
+        # Do not leave the command running if the callback raised
+        process.kill()
+        process.wait()
+        raise
+    exit_code, peak_memory = _wait(process)
+
+    return ExecutionResult(exit_code=exit_code, aborted=aborted, peak_memory=peak_memory)
+
+
+_WORKER_POOL: ProcessPoolExecutor = None
+"""The worker process for isolated callables, created on first use and reused afterwards."""
+
+
+def reset_worker_pool():
+    """
+    Shuts down the worker process of isolated callables, so the next call starts a fresh one importing the current
+    code of the callables (e.g., after their modules changed).
+    """
+    global _WORKER_POOL
+    if _WORKER_POOL is not None:
+        _WORKER_POOL.shutdown()
+        _WORKER_POOL = None
+
+
+def resolve_entry_point(entry_point: str, directory: str = None) -> Any:
+    """
+    Imports the attribute a 'module:attribute' entry point refers to (e.g., 'script:run' or 'package.module:a.b').
+    The directory stays on sys.path, so imports the module does lazily at call time keep working.
+
+    Parameters
+    ----------
+    entry_point : str
+        The entry point.
+    directory : str, optional
+        The directory to import the module from (added to sys.path).
+
+    Returns
+    -------
+    Any
+        The attribute.
+    """
+    module_name, _, attribute = entry_point.partition(":")
+    if not attribute:
+        raise ValueError(f"Invalid entry point '{entry_point}', expected 'module:attribute'.")
+    if directory and directory not in sys.path:
+        sys.path.insert(0, directory)
+    result = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        result = getattr(result, name)
+    return result
+
+
+def entry_point_directory(cwd: str, configuration: ConfigRun) -> str:
+    """
+    Returns the directory to import the entry point of a callable from. Isolated tests import it from the fixture
+    (or the test directory) rather than from their temporary working directory, which would pile up on sys.path.
+
+    Parameters
+    ----------
+    cwd : str
+        The directory to run the command in unless the configuration overrides it (i.e., the test directory).
+    configuration : ConfigRun
+        The configuration for running the command.
+
+    Returns
+    -------
+    str
+        The directory.
+    """
+    if configuration.isolation is not None:
+        fixture = configuration.isolation.fixture
+        return os.path.abspath(cwd if fixture is None else os.path.join(cwd, fixture))
+    return cwd if configuration.cwd is None else configuration.cwd
+
+
+def resolve_callable(func: Union[Callable, str], directory: str = None) -> Callable:
+    """
+    Resolves the callable of a run configuration.
+
+    Parameters
+    ----------
+    func : Union[Callable, str]
+        The callable (returned as is) or its 'module:function' entry point.
+    directory : str, optional
+        The directory to import the module from (added to sys.path).
+
+    Returns
+    -------
+    Callable
+        The callable.
+    """
+    return func if callable(func) else resolve_entry_point(func, directory)
+
+
+def _invoke_callable(
+    func: Union[Callable, str],
+    input_file: str,
+    output_file: str,
+    cwd: str,
+    args: list[str],
+    input_mode: InputMode,
+    output_mode: OutputMode,
+    module_directory: str = None,
+) -> int:
+    """
+    Invokes the callable in the current process with redirected streams and returns its exit code.
+
+    Parameters
+    ----------
+    func : Union[Callable, str]
+        The callable or entry point.
+    input_file : str
+        The file to read the input from.
+    output_file : str
+        The file to write the output to.
+    cwd : str
+        The directory to run the callable in.
+    args : list[str]
+        The formatted arguments.
+    input_mode : InputMode
+        The input mode.
+    output_mode : OutputMode
+        The output mode.
+    module_directory : str, optional
+        The directory to import the module of an entry point from.
+
+    Returns
+    -------
+    int
+        The exit code.
+    """
+    func = resolve_callable(func, module_directory)
+    previous_cwd = os.getcwd()
+    previous_stdin = sys.stdin
+    with open(output_file, "w") as output:
+        stdin = open(input_file) if input_mode == InputMode.STDIN else io.StringIO()
+        stdout = output if output_mode in [OutputMode.STDOUT, OutputMode.BOTH] else sys.stdout
+        stderr = output if output_mode in [OutputMode.STDERR, OutputMode.BOTH] else sys.stderr
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                sys.stdin = stdin
+                if cwd:
+                    os.chdir(cwd)
+                try:
+                    exit_code = func(stdin, stdout, args)
+                except SystemExit as e:
+                    exit_code = e.code
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+                # Like for SystemExit, values other than None and integers are printed and result in exit code 1
+                if exit_code is None:
+                    exit_code = 0
+                elif not isinstance(exit_code, int):
+                    print(exit_code, file=sys.stderr)
+                    exit_code = 1
+        finally:
+            sys.stdin = previous_stdin
+            os.chdir(previous_cwd)
+            stdin.close()
+    return exit_code
+
+
+def _execute_callable(
+    input_file: str,
+    output_file: str,
+    cwd: str,
+    args: list[str],
+    configuration: ConfigRun,
+    line_callback: Callable[[str], bool] = None,
+    module_directory: str = None,
+) -> ExecutionResult:
+    """
+    Invokes the callable of the run configuration, in-process or in the worker process.
+
+    Parameters
+    ----------
+    input_file : str
+        The file to read the input from.
+    output_file : str
+        The file to write the output to.
+    cwd : str
+        The directory to run the callable in.
+    args : list[str]
+        The formatted arguments.
+    configuration : ConfigRun
+        The configuration for running the command.
+    line_callback : Callable[[str], bool], optional
+        Receives the output line by line after the callable returned (callables cannot be aborted).
+    module_directory : str, optional
+        The directory to import the module of an entry point from.
+
+    Returns
+    -------
+    ExecutionResult
+        The result of the call.
+    """
+    global _WORKER_POOL
+    invocation = (
+        configuration.func,
+        input_file,
+        output_file,
+        cwd,
+        args,
+        configuration.input_mode,
+        configuration.output_mode,
+        module_directory,
+    )
+    if configuration.isolate:
+        if _WORKER_POOL is None:
+            _WORKER_POOL = ProcessPoolExecutor(max_workers=1)
+        try:
+            exit_code = _WORKER_POOL.submit(_invoke_callable, *invocation).result()
+        except BrokenProcessPool:
+            # The worker died (e.g., os._exit or a crash), start a fresh one next time
+            _WORKER_POOL = None
+            exit_code = -1
+    else:
+        exit_code = _invoke_callable(*invocation)
 
-    # Close the input file if necessary
-    if input_file is not None:
-        input_file.close()
+    # Replay the output to the line callback
+    if line_callback is not None and configuration.output_mode != OutputMode.NONE:
+        with open(output_file) as f:
+            for line in f:
+                if not line_callback(line):
+                    break
 
-    # Return the exit code and the path to the output file
-    return process.returncode
+    return ExecutionResult(exit_code=exit_code)
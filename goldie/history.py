@@ -0,0 +1,280 @@
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+
+from .execution import ExecutionResult
+from .performance import percentile
+
+HISTORY_DATABASE = os.path.abspath(os.environ["GOLDIE_HISTORY"]) if os.environ.get("GOLDIE_HISTORY") else None
+"""
+The SQLite database to append test results to (if any). A relative path is resolved against the working directory
+of the process, as by the command line interface.
+"""
+
+RUN_ID = os.environ.get("GOLDIE_RUN_ID") or time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+"""
+The identifier of the current run, grouping the results of all tests of one test session.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    input_file TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    exit_code INTEGER,
+    duration REAL,
+    output_size INTEGER,
+    peak_memory INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_input ON results (input_file, timestamp);
+"""
+
+
+@dataclass
+class HistoryEntry:
+    """A recorded test result."""
+
+    run_id: str
+    """The identifier of the run the result belongs to."""
+    timestamp: float
+    """The time the result was recorded (seconds since the epoch)."""
+    input_file: str
+    """The input file of the test, relative to the test directory."""
+    passed: bool
+    """Whether the test passed."""
+    exit_code: int = None
+    """The exit code of the command."""
+    duration: float = None
+    """The duration of the command in seconds."""
+    output_size: int = None
+    """The size of the output in bytes."""
+    peak_memory: int = None
+    """The peak resident set size of the command in bytes."""
+
+
+@dataclass
+class RunSummary:
+    """A summary of all results of a run."""
+
+    run_id: str
+    """The identifier of the run."""
+    timestamp: float
+    """The time of the first result of the run (seconds since the epoch)."""
+    tests: int
+    """The number of recorded tests."""
+    failures: int
+    """The number of failed tests."""
+    duration: float
+    """The summed duration of all commands in seconds."""
+
+
+@dataclass
+class Slowdown:
+    """The change in duration of a test between two runs."""
+
+    input_file: str
+    """The input file of the test."""
+    base_duration: float
+    """The duration in the base run in seconds."""
+    head_duration: float
+    """The duration in the head run in seconds."""
+
+    @property
+    def ratio(self) -> float:
+        """The head duration relative to the base duration."""
+        return self.head_duration / self.base_duration if self.base_duration else float("inf")
+
+
+def _test_name(input_file: str) -> str:
+    """
+    Normalizes the path of an input file relative to the test directory, so results match across checkouts and
+    platforms.
+    """
+    return os.path.normpath(input_file).replace(os.sep, "/")
+
+
+def _connect(database: str) -> sqlite3.Connection:
+    """
+    Opens the database, creating the schema if necessary.
+    """
+    connection = sqlite3.connect(database, timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def record(
+    database: str,
+    input_file: str,
+    passed: bool,
+    result: ExecutionResult = None,
+    run_id: str = None,
+):
+    """
+    Appends a test result to the history database.
+
+    Parameters
+    ----------
+    database : str
+        The path to the SQLite database (created if necessary).
+    input_file : str
+        The input file of the test, relative to the test directory.
+    passed : bool
+        Whether the test passed.
+    result : ExecutionResult, optional
+        The result of the command, if it ran.
+    run_id : str, optional
+        The identifier of the run, by default the one of the current process.
+    """
+    result = result or ExecutionResult(exit_code=None)
+    connection = _connect(database)
+    try:
+        with connection:
+            connection.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id or RUN_ID,
+                    time.time(),
+                    _test_name(input_file),
+                    int(passed),
+                    result.exit_code,
+                    result.duration,
+                    result.output_size,
+                    result.peak_memory,
+                ),
+            )
+    finally:
+        connection.close()
+
+
+def runs(database: str, limit: int = 20) -> list[RunSummary]:
+    """
+    Returns summaries of the most recent runs.
+
+    Parameters
+    ----------
+    database : str
+        The path to the SQLite database.
+    limit : int, optional
+        The maximum number of runs, by default 20.
+
+    Returns
+    -------
+    list[RunSummary]
+        The run summaries, most recent first.
+    """
+    connection = _connect(database)
+    try:
+        rows = connection.execute(
+            "SELECT run_id, MIN(timestamp), COUNT(*), SUM(1 - passed), COALESCE(SUM(duration), 0) "
+            + "FROM results GROUP BY run_id ORDER BY MIN(timestamp) DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        connection.close()
+    return [RunSummary(*row) for row in rows]
+
+
+def trend(database: str, input_file: str, limit: int = 20) -> list[HistoryEntry]:
+    """
+    Returns the most recent results of a test.
+
+    Parameters
+    ----------
+    database : str
+        The path to the SQLite database.
+    input_file : str
+        The input file of the test, relative to the test directory.
+    limit : int, optional
+        The maximum number of results, by default 20.
+
+    Returns
+    -------
+    list[HistoryEntry]
+        The results in chronological order.
+    """
+    connection = _connect(database)
+    try:
+        rows = connection.execute(
+            "SELECT * FROM results WHERE input_file = ? ORDER BY timestamp DESC LIMIT ?",
+            (_test_name(input_file), limit),
+        ).fetchall()
+    finally:
+        connection.close()
+    return [HistoryEntry(*row[:3], bool(row[3]), *row[4:]) for row in reversed(rows)]
+
+
+def percentiles(
+    database: str,
+    input_file: str = None,
+    quantiles: tuple[float, ...] = (50, 90, 99),
+) -> dict[str, dict[float, float]]:
+    """
+    Computes duration percentiles per test over all recorded runs.
+
+    Parameters
+    ----------
+    database : str
+        The path to the SQLite database.
+    input_file : str, optional
+        Only compute the percentiles of this test (relative to the test directory).
+    quantiles : tuple[float, ...], optional
+        The percentiles to compute, by default (50, 90, 99).
+
+    Returns
+    -------
+    dict[str, dict[float, float]]
+        The duration percentiles in seconds per input file.
+    """
+    connection = _connect(database)
+    try:
+        query = "SELECT input_file, duration FROM results WHERE duration IS NOT NULL"
+        parameters = ()
+        if input_file is not None:
+            query += " AND input_file = ?"
+            parameters = (_test_name(input_file),)
+        durations = {}
+        for file, duration in connection.execute(query + " ORDER BY input_file, duration", parameters):
+            durations.setdefault(file, []).append(duration)
+    finally:
+        connection.close()
+    return {file: {q: percentile(values, q) for q in quantiles} for file, values in durations.items()}
+
+
+def slowdowns(database: str, base_run: str, head_run: str, limit: int = 10) -> list[Slowdown]:
+    """
+    Returns the tests that slowed down the most between two runs.
+
+    Parameters
+    ----------
+    database : str
+        The path to the SQLite database.
+    base_run : str
+        The identifier of the run to compare against.
+    head_run : str
+        The identifier of the run to compare.
+    limit : int, optional
+        The maximum number of tests, by default 10.
+
+    Returns
+    -------
+    list[Slowdown]
+        The tests recorded in both runs, ordered by descending duration ratio.
+    """
+    connection = _connect(database)
+    try:
+        rows = connection.execute(
+            "SELECT base.input_file, AVG(base.duration), head.duration FROM results AS base "
+            + "JOIN (SELECT input_file, AVG(duration) AS duration FROM results WHERE run_id = ? GROUP BY input_file) "
+            + "AS head ON base.input_file = head.input_file "
+            + "WHERE base.run_id = ? AND base.duration IS NOT NULL AND head.duration IS NOT NULL "
+            + "GROUP BY base.input_file",
+            (head_run, base_run),
+        ).fetchall()
+    finally:
+        connection.close()
+    result = [Slowdown(*row) for row in rows]
+    result.sort(key=lambda s: s.ratio, reverse=True)
+    return result[:limit]
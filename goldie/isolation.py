@@ -0,0 +1,204 @@
+import atexit
+import errno
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from enum import Enum
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+_FICLONE = 0x40049409
+"""The Linux ioctl cloning a file copy-on-write (reflink)."""
+
+_REFLINK_UNSUPPORTED = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS)
+"""The errors indicating that the file system does not support reflinks."""
+
+
+class CloneMode(Enum):
+    REFLINK = "reflink"
+    """Clones files copy-on-write where the file system supports it, copies them otherwise."""
+    HARDLINK = "hardlink"
+    """
+    Clones files copy-on-write where the file system supports it, hardlinks them otherwise.
+    Only safe if the command replaces files instead of modifying them in place, since that would alter the fixture.
+    """
+    COPY = "copy"
+    """Copies files."""
+
+
+@dataclass
+class ConfigIsolation:
+    """Configuration for running each test in its own working directory cloned from a fixture tree."""
+
+    fixture: str = None
+    """The directory (relative to the test directory) to clone into each working directory (None for empty ones)."""
+    clone_mode: CloneMode = CloneMode.REFLINK
+    """How to clone the files of the fixture."""
+    directory: str = ".goldie/work"
+    """
+    The directory (relative to the test directory) to create the working directories in. Reflinks and hardlinks
+    require it to be on the same file system as the fixture.
+    """
+    keep_on_failure: bool = True
+    """Whether to keep the working directory of failed tests for inspection."""
+
+
+def _reflink(source: str, target: str) -> bool:
+    """
+    Clones a file copy-on-write.
+
+    Returns
+    -------
+    bool
+        Whether the file was cloned (False if the file system does not support reflinks).
+    """
+    if fcntl is None:
+        return False
+    with open(source, "rb") as s, open(target, "wb") as t:
+        try:
+            fcntl.ioctl(t.fileno(), _FICLONE, s.fileno())
+        except OSError as e:
+            if e.errno in _REFLINK_UNSUPPORTED:
+                return False
+            raise
+    shutil.copystat(source, target)
+    return True
+
+
+def clone_tree(source: str, target: str, mode: CloneMode = CloneMode.REFLINK, exclude: str = None):
+    """
+    Clones a directory tree, using reflinks or hardlinks instead of copying file contents where possible.
+
+    Parameters
+    ----------
+    source : str
+        The directory to clone.
+    target : str
+        The directory to clone into (created if necessary).
+    mode : CloneMode, optional
+        How to clone the files, by default CloneMode.REFLINK.
+    exclude : str, optional
+        A directory below the source not to clone (e.g., the one containing the target).
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    # Fall back for all remaining files once reflinks turn out to be unsupported
+    reflink = mode != CloneMode.COPY
+
+    def clone(source_directory: str, target_directory: str):
+        nonlocal reflink
+        os.makedirs(target_directory, exist_ok=True)
+        with os.scandir(source_directory) as entries:
+            for entry in entries:
+                target_path = os.path.join(target_directory, entry.name)
+                if exclude and os.path.abspath(entry.path) == exclude:
+                    continue
+                if entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), target_path)
+                elif entry.is_dir():
+                    clone(entry.path, target_path)
+                elif reflink and _reflink(entry.path, target_path):
+                    continue
+                else:
+                    reflink = False
+                    if mode == CloneMode.HARDLINK:
+                        if os.path.exists(target_path):
+                            os.remove(target_path)
+                        os.link(entry.path, target_path)
+                    else:
+                        shutil.copy2(entry.path, target_path)
+
+    clone(source, target)
+
+
+def flat_name(input_file: str, root_directory: str) -> str:
+    """
+    Derives a file name identifying a test from the path of its input file (e.g., for its working directory).
+
+    Parameters
+    ----------
+    input_file : str
+        The input file of the test.
+    root_directory : str
+        The test directory the input file is relative to.
+
+    Returns
+    -------
+    str
+        The path of the input file relative to the test directory, with separators and other special characters
+        replaced.
+    """
+    return re.sub(r"[^\w.-]+", "_", os.path.relpath(os.path.join(root_directory, input_file), root_directory))
+
+
+def create_working_directory(input_file: str, root_directory: str, configuration: ConfigIsolation) -> str:
+    """
+    Creates the working directory of a test, cloned from the fixture.
+
+    Parameters
+    ----------
+    input_file : str
+        The input file of the test (used to name the directory).
+    root_directory : str
+        The test directory the paths of the configuration are relative to.
+    configuration : ConfigIsolation
+        The isolation configuration.
+
+    Returns
+    -------
+    str
+        The path of the working directory.
+    """
+    base = os.path.join(root_directory, configuration.directory)
+    os.makedirs(base, exist_ok=True)
+    directory = tempfile.mkdtemp(prefix=flat_name(input_file, root_directory) + "-", dir=base)
+    if configuration.fixture is not None:
+        fixture = os.path.join(root_directory, configuration.fixture)
+        clone_tree(fixture, directory, configuration.clone_mode, exclude=base)
+    return directory
+
+
+_CLEANUP_QUEUE: queue.Queue = queue.Queue()
+"""The working directories waiting to be removed."""
+
+_CLEANUP_THREAD: threading.Thread = None
+"""The thread removing working directories in the background, started on first use."""
+
+_CLEANUP_LOCK = threading.Lock()
+"""Guards starting the cleanup thread."""
+
+
+def _cleanup():
+    """
+    Removes the queued working directories.
+    """
+    while True:
+        directory = _CLEANUP_QUEUE.get()
+        try:
+            shutil.rmtree(directory, ignore_errors=True)
+        finally:
+            _CLEANUP_QUEUE.task_done()
+
+
+def remove_async(directory: str):
+    """
+    Removes a working directory in the background. Pending removals are finished before the interpreter exits.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to remove.
+    """
+    global _CLEANUP_THREAD
+    with _CLEANUP_LOCK:
+        if _CLEANUP_THREAD is None:
+            _CLEANUP_THREAD = threading.Thread(target=_cleanup, name="goldie-cleanup", daemon=True)
+            _CLEANUP_THREAD.start()
+            atexit.register(_CLEANUP_QUEUE.join)
+    _CLEANUP_QUEUE.put(directory)
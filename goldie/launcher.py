@@ -0,0 +1,303 @@
+import atexit
+import json
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+
+# This module doubles as the script of the launcher process, so it must only import the standard library
+
+SUPPORTED = hasattr(os, "fork") and hasattr(os, "wait4") and hasattr(socket, "send_fds")
+"""Whether commands can be started through the launcher (POSIX), otherwise they are started directly."""
+
+_HEADER = struct.Struct("!I")
+"""The length prefix of the requests sent to the launcher."""
+
+_DEFAULT_SIGNALS = ["SIGINT", "SIGPIPE", "SIGXFSZ", "SIGCHLD"]
+"""The signals the launcher or Python changes the handling of, restored for the commands."""
+
+
+def _receive(connection: socket.socket, length: int) -> bytes:
+    """
+    Receives exactly the given number of bytes (fewer if the connection is closed).
+    """
+    data = b""
+    while len(data) < length:
+        chunk = connection.recv(length - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _spawn(request: dict, streams: list[int]) -> int:
+    """
+    Forks and executes the command of a request (in the forked process, never returns there).
+
+    Returns
+    -------
+    int
+        The process ID of the command.
+
+    Raises
+    ------
+    OSError
+        If the command could not be executed (e.g., it does not exist).
+    """
+    error_read, error_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        filename = request["cwd"]
+        try:
+            os.close(error_read)
+            for target, fd in enumerate(streams):
+                os.dup2(fd, target)
+            for name in _DEFAULT_SIGNALS:
+                if hasattr(signal, name):
+                    signal.signal(getattr(signal, name), signal.SIG_DFL)
+            os.chdir(filename)
+            filename = request["command"][0]
+            os.execvpe(filename, request["command"], request["env"])
+        except OSError as e:
+            os.write(error_write, json.dumps([e.errno, filename]).encode())
+        finally:
+            os._exit(255)
+
+    # The pipe is closed on exec, so it only yields data if executing the command failed
+    os.close(error_write)
+    with open(error_read, "rb") as f:
+        error = f.read()
+    if error:
+        os.waitpid(pid, 0)
+        code, filename = json.loads(error)
+        raise OSError(code, os.strerror(code), filename)
+    return pid
+
+
+def _handle(channel: socket.socket, request: dict, streams: list[int]):
+    """
+    Runs a command and reports its process ID and, once it finished, its exit code and peak memory to the channel.
+    Runs in a process forked from the launcher, so the command starts with the small footprint of the launcher.
+    """
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    with channel, channel.makefile("w") as replies:
+        try:
+            pid = _spawn(request, streams)
+        except OSError as e:
+            replies.write(json.dumps({"errno": e.errno, "filename": e.filename}) + "\n")
+            return
+        finally:
+            for fd in streams:
+                os.close(fd)
+        replies.write(json.dumps({"pid": pid}) + "\n")
+        replies.flush()
+
+        _, status, usage = os.wait4(pid, 0)
+        # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+        peak_memory = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        replies.write(json.dumps({"exit_code": os.waitstatus_to_exitcode(status), "peak_memory": peak_memory}) + "\n")
+
+
+def serve(control_fd: int):
+    """
+    Serves the requests to run commands until the control connection is closed.
+
+    Parameters
+    ----------
+    control_fd : int
+        The file descriptor of the control connection.
+    """
+    control = socket.socket(fileno=control_fd)
+    # Reap the forked handlers automatically and leave interrupts to the commands and the test process
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        header, fds, _, _ = socket.recv_fds(control, _HEADER.size, 4)
+        if not header:
+            break
+        for fd in fds:
+            os.set_inheritable(fd, False)
+        header += _receive(control, _HEADER.size - len(header))
+        request = json.loads(_receive(control, _HEADER.unpack(header)[0]))
+        if os.fork() == 0:
+            try:
+                control.close()
+                _handle(socket.socket(fileno=fds[0]), request, fds[1:])
+            finally:
+                os._exit(0)
+        for fd in fds:
+            os.close(fd)
+
+
+class LaunchedProcess:
+    """A command started by the launcher."""
+
+    def __init__(self, channel: socket.socket):
+        self.channel = channel
+        self.replies = channel.makefile("r")
+        self.pid = self._reply()["pid"]
+        self.finished = False
+
+    def _reply(self) -> dict:
+        """
+        Reads the next reply of the handler, raising the error it reports, if any.
+        """
+        line = self.replies.readline()
+        if not line:
+            raise OSError("The launcher process terminated unexpectedly.")
+        reply = json.loads(line)
+        if "errno" in reply:
+            self.close()
+            raise OSError(reply["errno"], os.strerror(reply["errno"]), reply["filename"])
+        return reply
+
+    def close(self):
+        """
+        Closes the channel to the handler.
+        """
+        self.replies.close()
+        self.channel.close()
+
+    def kill(self):
+        """
+        Kills the command (unless it already finished).
+        """
+        if not self.finished:
+            os.kill(self.pid, signal.SIGKILL)
+
+    def wait(self) -> tuple[int, int]:
+        """
+        Waits for the command to finish.
+
+        Returns
+        -------
+        tuple[int, int]
+            The exit code and the peak resident set size of the command in bytes.
+        """
+        try:
+            reply = self._reply()
+        finally:
+            self.finished = True
+            self.close()
+        return reply["exit_code"], reply["peak_memory"]
+
+
+class _DirectProcess:
+    """A command started directly where the launcher is not supported (the peak memory is not measured)."""
+
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self.pid = process.pid
+
+    def kill(self):
+        """
+        Kills the command.
+        """
+        self.process.kill()
+
+    def wait(self) -> tuple[int, int]:
+        """
+        Waits for the command to finish.
+
+        Returns
+        -------
+        tuple[int, int]
+            The exit code and None for the peak memory.
+        """
+        return self.process.wait(), None
+
+
+class _Launcher:
+    """The launcher process, forking the commands from its own small footprint."""
+
+    def __init__(self):
+        control, remote = socket.socketpair()
+        with remote:
+            self.process = subprocess.Popen(
+                [sys.executable, "-I", "-S", os.path.abspath(__file__), str(remote.fileno())],
+                stdin=subprocess.DEVNULL,
+                pass_fds=[remote.fileno()],
+            )
+        self.control = control
+        self.lock = threading.Lock()
+
+    def launch(self, request: dict, streams: list[int]) -> LaunchedProcess:
+        """
+        Sends a request to run a command, along with a new channel to the handler and the streams of the command.
+        """
+        channel, remote = socket.socketpair()
+        payload = json.dumps(request).encode()
+        with remote, self.lock:
+            socket.send_fds(self.control, [_HEADER.pack(len(payload))], [remote.fileno(), *streams])
+            self.control.sendall(payload)
+        return LaunchedProcess(channel)
+
+    def close(self):
+        """
+        Stops the launcher by closing the control connection.
+        """
+        self.control.close()
+        self.process.wait()
+
+
+_LAUNCHER: _Launcher = None
+"""The launcher process, started on first use and reused afterwards."""
+
+_LAUNCHER_LOCK = threading.Lock()
+"""Guards starting the launcher process."""
+
+
+def _shutdown():
+    """
+    Stops the launcher process.
+    """
+    if _LAUNCHER is not None:
+        _LAUNCHER.close()
+
+
+def launch(command: list[str], cwd: str = None, stdin: int = None, stdout: int = None, stderr: int = None):
+    """
+    Starts a command from the launcher process, a small process started once and forking all commands. Unlike for
+    commands started by the test process itself, the peak memory of the command then does not include the memory of
+    the test process (which a forked child inherits until it executes the command).
+
+    Parameters
+    ----------
+    command : list[str]
+        The command and its arguments.
+    cwd : str, optional
+        The directory to run the command in, by default the current one.
+    stdin : int, optional
+        The file descriptor to use as stdin, by default the one of this process (likewise for stdout and stderr).
+
+    Returns
+    -------
+    LaunchedProcess
+        The started command (providing pid, kill() and wait()).
+    """
+    if not SUPPORTED:
+        return _DirectProcess(subprocess.Popen(command, stdin=stdin, stdout=stdout, stderr=stderr, cwd=cwd))
+
+    global _LAUNCHER
+    with _LAUNCHER_LOCK:
+        if _LAUNCHER is None:
+            atexit.register(_shutdown)
+        if _LAUNCHER is None or _LAUNCHER.process.poll() is not None:
+            # (Re)start the launcher, e.g., if it was killed
+            _LAUNCHER = _Launcher()
+        launcher = _LAUNCHER
+
+    request = {
+        "command": [os.fspath(arg) for arg in command],
+        "cwd": os.fspath(cwd) if cwd else os.getcwd(),
+        "env": dict(os.environ),
+    }
+    # Pass the streams of this process for the ones not redirected
+    return launcher.launch(request, [i if fd is None else fd for i, fd in enumerate([stdin, stdout, stderr])])
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
@@ -0,0 +1,165 @@
+import json
+import os
+from dataclasses import dataclass
+
+from .execution import ConfigRunValidation, ExecutionResult
+
+
+@dataclass
+class Baseline:
+    """The recorded performance of a command, stored next to the golden file."""
+
+    duration: float = None
+    """The duration of the command in seconds."""
+    peak_memory: int = None
+    """The peak resident set size of the command in bytes."""
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Computes a percentile of values using linear interpolation.
+
+    Parameters
+    ----------
+    values : list[float]
+        The values (need not be sorted).
+    q : float
+        The percentile in [0, 100].
+
+    Returns
+    -------
+    float
+        The percentile.
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def has_budgets(configuration: ConfigRunValidation) -> bool:
+    """
+    Returns whether any performance budget is configured.
+    """
+    return has_relative_budgets(configuration) or any(
+        b is not None for b in [configuration.max_duration, configuration.max_peak_memory]
+    )
+
+
+def has_relative_budgets(configuration: ConfigRunValidation) -> bool:
+    """
+    Returns whether any budget relative to the baseline is configured.
+    """
+    return any(b is not None for b in [configuration.max_duration_ratio, configuration.max_peak_memory_ratio])
+
+
+def summarize(results: list[ExecutionResult], configuration: ConfigRunValidation) -> Baseline:
+    """
+    Summarizes repeated measurements by the configured percentile.
+
+    Parameters
+    ----------
+    results : list[ExecutionResult]
+        The results of the repeated runs.
+    configuration : ConfigRunValidation
+        The validation configuration defining the percentile.
+
+    Returns
+    -------
+    Baseline
+        The summarized duration and peak memory (None if not measured).
+    """
+    durations = [r.duration for r in results if r.duration is not None]
+    peak_memories = [r.peak_memory for r in results if r.peak_memory is not None]
+    return Baseline(
+        duration=percentile(durations, configuration.budget_percentile) if durations else None,
+        peak_memory=int(percentile(peak_memories, configuration.budget_percentile)) if peak_memories else None,
+    )
+
+
+def load_baseline(path: str) -> Baseline:
+    """
+    Loads a baseline file (None if it does not exist).
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return Baseline(**json.load(f))
+
+
+def save_baseline(path: str, baseline: Baseline):
+    """
+    Writes a baseline file.
+    """
+    with open(path, "w") as f:
+        json.dump({"duration": baseline.duration, "peak_memory": baseline.peak_memory}, f, indent=4)
+
+
+def format_bytes(value: float) -> str:
+    """
+    Formats a number of bytes in a human readable way ('-' for None).
+    """
+    if value is None:
+        return "-"
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if value < 1024 or unit == "GiB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{value:g} B"
+        value /= 1024
+
+
+def check_budgets(
+    results: list[ExecutionResult],
+    configuration: ConfigRunValidation,
+    baseline: Baseline = None,
+) -> list[str]:
+    """
+    Checks the measured runs against the configured performance budgets.
+
+    Parameters
+    ----------
+    results : list[ExecutionResult]
+        The results of the repeated runs.
+    configuration : ConfigRunValidation
+        The validation configuration defining the budgets.
+    baseline : Baseline, optional
+        The recorded baseline for relative budgets.
+
+    Returns
+    -------
+    list[str]
+        A message per exceeded budget (empty if all budgets are met).
+    """
+    measured = summarize(results, configuration)
+    statistic = f"p{configuration.budget_percentile:g} of {len(results)} run(s)"
+    failures = []
+
+    if has_relative_budgets(configuration) and baseline is None:
+        failures.append("No performance baseline found, record one by running with GOLDIE_UPDATE=1.")
+
+    # Collect the budgets as (name, measured value, budget, budget description, formatter)
+    budgets = []
+    if measured.duration is not None:
+        if configuration.max_duration is not None:
+            budgets.append(("Duration", measured.duration, configuration.max_duration, "absolute", "{:.3f}s"))
+        if configuration.max_duration_ratio is not None and baseline and baseline.duration is not None:
+            budget = baseline.duration * configuration.max_duration_ratio
+            description = f"{configuration.max_duration_ratio:g}x baseline of {baseline.duration:.3f}s"
+            budgets.append(("Duration", measured.duration, budget, description, "{:.3f}s"))
+    if measured.peak_memory is not None:
+        if configuration.max_peak_memory is not None:
+            budgets.append(("Peak memory", measured.peak_memory, configuration.max_peak_memory, "absolute", None))
+        if configuration.max_peak_memory_ratio is not None and baseline and baseline.peak_memory is not None:
+            budget = baseline.peak_memory * configuration.max_peak_memory_ratio
+            description = f"{configuration.max_peak_memory_ratio:g}x baseline of {format_bytes(baseline.peak_memory)}"
+            budgets.append(("Peak memory", measured.peak_memory, budget, description, None))
+
+    for name, value, budget, description, formatter in budgets:
+        if value <= budget:
+            continue
+        format_value = formatter.format if formatter else format_bytes
+        failures.append(
+            f"{name} budget exceeded: {statistic} is {format_value(value)}, "
+            + f"budget is {format_value(budget)} ({description})."
+        )
+    return failures
@@ -0,0 +1,204 @@
+import cProfile
+import dataclasses
+import io
+import os
+import pstats
+import re
+import subprocess
+import sys
+import tempfile
+
+from .execution import (
+    ConfigProfile,
+    ConfigRun,
+    ExecutionResult,
+    entry_point_directory,
+    execute_with_result,
+    resolve_callable,
+)
+from .history import RUN_ID
+from .isolation import flat_name
+
+
+def should_profile(configuration: ConfigProfile, passed: bool, result: ExecutionResult) -> bool:
+    """
+    Returns whether a test is to be profiled according to its outcome.
+
+    Parameters
+    ----------
+    configuration : ConfigProfile
+        The profiling configuration (None for no profiling).
+    passed : bool
+        Whether the test passed.
+    result : ExecutionResult
+        The result of the command (None if it did not run).
+
+    Returns
+    -------
+    bool
+        Whether to profile the test.
+    """
+    if configuration is None or result is None:
+        return False
+    if not passed and configuration.on_failure:
+        return True
+    return configuration.min_duration is not None and result.duration >= configuration.min_duration
+
+
+def _is_python(cmd: str) -> bool:
+    """
+    Returns whether the command is a Python interpreter.
+    """
+    return cmd == sys.executable or re.match(r"python[\d.]*(\.exe)?\Z", os.path.basename(cmd)) is not None
+
+
+def _escape(value: str) -> str:
+    """
+    Escapes a value for use in arguments that are formatted with placeholders.
+    """
+    return value.replace("{", "{{").replace("}", "}}")
+
+
+def _profile_file(input_file: str, root_directory: str, directory: str, extension: str) -> str:
+    """
+    Returns the path of the profile of a test (in a subdirectory per run).
+    """
+    return os.path.join(root_directory, directory, RUN_ID, flat_name(input_file, root_directory) + extension)
+
+
+def _profiled_configuration(configuration: ConfigRun, module_directory: str, profile_file: str) -> ConfigRun:
+    """
+    Derives the run configuration recording a profile (None if the command cannot be profiled).
+    """
+    profile = configuration.profile
+
+    # Profile callables in-process
+    if configuration.func is not None:
+        func = resolve_callable(configuration.func, module_directory)
+
+        def profiled(stdin, stdout, args):
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, stdin, stdout, args)
+            finally:
+                profiler.dump_stats(profile_file)
+
+        return dataclasses.replace(configuration, func=profiled, isolate=False)
+
+    # Run Python scripts and modules via cProfile
+    if _is_python(configuration.cmd):
+        return dataclasses.replace(
+            configuration, args=["-m", "cProfile", "-o", _escape(profile_file), *configuration.args]
+        )
+
+    # Prefix other commands with the wrapper
+    if profile.wrapper:
+        wrapper = [arg.replace("{profile}", profile_file) for arg in profile.wrapper]
+        return dataclasses.replace(
+            configuration,
+            cmd=wrapper[0],
+            args=[*map(_escape, wrapper[1:]), _escape(configuration.cmd), *configuration.args],
+        )
+    return None
+
+
+def summarize_profile(profile_file: str, configuration: ConfigProfile) -> str:
+    """
+    Summarizes a cProfile profile by its top functions.
+
+    Parameters
+    ----------
+    profile_file : str
+        The profile recorded by cProfile.
+    configuration : ConfigProfile
+        The profiling configuration defining the sort key and number of functions.
+
+    Returns
+    -------
+    str
+        The summary.
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(profile_file, stream=stream)
+    stats.strip_dirs().sort_stats(configuration.sort).print_stats(configuration.top)
+    return stream.getvalue().strip("\n")
+
+
+def _report(profile_file: str, configuration: ConfigProfile) -> str:
+    """
+    Summarizes a profile recorded by the wrapper via the report command (first lines of its output).
+    """
+    report = subprocess.run(
+        [arg.replace("{profile}", profile_file) for arg in configuration.report],
+        capture_output=True,
+        text=True,
+    )
+    lines = [line for line in report.stdout.splitlines() if line.strip() and not line.startswith("#")]
+    return "\n".join(lines[: configuration.top])
+
+
+def capture_profile(
+    input_file: str,
+    root_directory: str,
+    configuration: ConfigRun,
+    extra_args: list[tuple[str, str]] = None,
+    duration: float = None,
+) -> str:
+    """
+    Reruns a command under a profiler and summarizes the profile.
+
+    Parameters
+    ----------
+    input_file : str
+        The input file of the test.
+    root_directory : str
+        The directory to run the command in (the profile directory is relative to it).
+    configuration : ConfigRun
+        The run configuration including the profiling configuration.
+    extra_args : list[tuple[str, str]], optional
+        Extra arguments to pass to the command.
+    duration : float, optional
+        The duration of the profiled test in seconds (for the summary).
+
+    Returns
+    -------
+    str
+        A message with the path of the profile and its summary.
+    """
+    profile = configuration.profile
+    python = configuration.func is not None or _is_python(configuration.cmd)
+    profile_file = _profile_file(input_file, root_directory, profile.directory, ".prof" if python else ".data")
+
+    # Profiling is best effort, never let it hide the outcome of the test
+    try:
+        profiled = _profiled_configuration(
+            configuration, entry_point_directory(root_directory, configuration), profile_file
+        )
+        if profiled is None:
+            return f"Cannot profile {input_file}: no profiler wrapper configured for '{configuration.cmd}'."
+
+        # Rerun the command, discarding its output
+        os.makedirs(os.path.dirname(profile_file), exist_ok=True)
+        with tempfile.TemporaryDirectory() as directory:
+            output_dir = os.path.join(directory, "output_dir")
+            os.mkdir(output_dir)
+            execute_with_result(
+                input_file=input_file,
+                output_file=os.path.join(directory, "output"),
+                cwd=root_directory,
+                configuration=profiled,
+                extra_args=extra_args,
+                output_dir=output_dir,
+            )
+        if not os.path.isfile(profile_file):
+            return f"Failed to profile {input_file}: no profile written to {profile_file}."
+
+        took = "" if duration is None else f" (took {duration:.3f}s)"
+        message = f"Profile of {input_file}{took} written to {profile_file}"
+        if python:
+            message += ":\n" + summarize_profile(profile_file, profile)
+        elif profile.report is not None:
+            message += ":\n" + _report(profile_file, profile)
+        return message
+    except Exception as e:
+        return f"Failed to profile {input_file}: {e}"
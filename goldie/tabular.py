@@ -0,0 +1,369 @@
+import csv
+import math
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from operator import itemgetter
+
+from .diff import Difference
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+@dataclass
+class CsvTolerance:
+    """Defines the numeric tolerance for a CSV column."""
+
+    column: str
+    """The name of the column."""
+    absolute: float = 0.0
+    """The absolute tolerance."""
+    relative: float = 0.0
+    """The tolerance relative to the expected value."""
+
+
+@dataclass
+class ConfigCompareCsv:
+    """
+    Configuration for comparing CSV/TSV tables (the first row is expected to be the header). Tables with duplicate
+    column names are rejected, since their columns cannot be told apart.
+    """
+
+    delimiter: str = ","
+    """The delimiter of the table (e.g., '\\t' for TSV)."""
+    key_columns: list[str] = field(default_factory=list)
+    """Columns identifying a row. If given, rows are aligned by key instead of by position."""
+    ignore_columns: list[str] = field(default_factory=list)
+    """Columns to ignore."""
+    tolerances: list[CsvTolerance] = field(default_factory=list)
+    """Numeric tolerances per column. Values of these columns are compared as numbers."""
+    ignore_row_order: bool = False
+    """
+    Whether the order of the rows does not matter (implied when aligning by key columns). Without key columns, rows
+    are matched by their content and the remaining rows are paired in order to report their differing values.
+    """
+    max_differences: int = 100
+    """
+    The maximum number of differences to report individually (None for no limit, 0 for only a summary).
+    Further differences are only counted and summarized by column.
+    """
+
+
+class _Table:
+    """A table stored column-wise."""
+
+    def __init__(self, lines: Iterable[str], delimiter: str):
+        reader = csv.reader(lines, delimiter=delimiter)
+        self.header = next(reader, [])
+        self.duplicates = [name for name, count in Counter(self.header).items() if count > 1]
+        rows = list(reader)
+        self.length = len(rows)
+        width = len(self.header)
+        # The rows whose width differs from the header, by index
+        self.ragged = {i: row for i, row in enumerate(rows) if len(row) != width}
+        if not self.ragged:
+            self.columns = {name: list(map(itemgetter(i), rows)) for i, name in enumerate(self.header)}
+        else:
+            # Short rows are padded with empty values, cells beyond the header are compared separately
+            self.columns = {
+                name: [row[i] if i < len(row) else "" for row in rows] for i, name in enumerate(self.header)
+            }
+
+    def row_keys(self, columns: list[str]) -> list:
+        """
+        Returns the key of every row made up from the given columns.
+        """
+        if len(columns) == 1:
+            return self.columns[columns[0]]
+        return list(zip(*[self.columns[c] for c in columns])) if columns else [()] * self.length
+
+
+def _label(key: any) -> str:
+    """
+    Returns the label of a row key.
+    """
+    return "|".join(key) if isinstance(key, tuple) else key
+
+
+def _align(
+    actual: _Table,
+    expected: _Table,
+    configuration: ConfigCompareCsv,
+    columns: list[str],
+) -> tuple[list[int], list[int], Callable[[int], str], list[Difference], int]:
+    """
+    Aligns the rows of the actual and expected tables.
+
+    Returns
+    -------
+    tuple[list[int], list[int], Callable[[int], str], list[Difference], int]
+        The aligned actual row indices, expected row indices, a function returning the label of an aligned row, the
+        differences for unmatched rows and the number of leading aligned rows whose columns without tolerance are
+        already known to be equal (when matching rows by their content).
+    """
+    differences = []
+
+    # Align by position
+    if not configuration.key_columns and not configuration.ignore_row_order:
+        n = min(actual.length, expected.length)
+        for i in range(n, expected.length):
+            differences.append(Difference(expected=f"row {i}", actual="", location=f"row={i}", message="Missing row."))
+        for i in range(n, actual.length):
+            differences.append(
+                Difference(expected="", actual=f"row {i}", location=f"row={i}", message="Additional row.")
+            )
+        rows = list(range(n))
+        return rows, rows, str, differences, 0
+
+    # Align by key (all compared columns without tolerance if no key columns are given)
+    by_content = not configuration.key_columns
+    tolerances = {t.column for t in configuration.tolerances}
+    key_columns = configuration.key_columns or [c for c in columns if c not in tolerances]
+    actual_keys = actual.row_keys(key_columns)
+    expected_keys = expected.row_keys(key_columns)
+
+    def label(i: int) -> str:
+        return str(expected_rows[i]) if by_content else _label(expected_keys[expected_rows[i]])
+
+    # Identical key order needs no lookup
+    if actual_keys == expected_keys:
+        expected_rows = list(range(expected.length))
+        return expected_rows, expected_rows, label, differences, expected.length if by_content else 0
+
+    # Match the expected rows to the actual rows via a hash index (duplicate keys are matched in order)
+    unique_index = dict(zip(actual_keys, range(actual.length)))
+    duplicates = {}
+    if len(unique_index) != actual.length:
+        for i, key in enumerate(actual_keys):
+            duplicates.setdefault(key, []).append(i)
+        duplicates = {key: rows for key, rows in duplicates.items() if len(rows) > 1}
+    actual_rows, expected_rows, missing = [], [], []
+    for i, key in enumerate(expected_keys):
+        match = unique_index.pop(key, None) if key not in duplicates else None
+        if key in duplicates:
+            match = duplicates[key].pop(0) if duplicates[key] else None
+        if match is None:
+            missing.append(i)
+            continue
+        actual_rows.append(match)
+        expected_rows.append(i)
+    remaining = [i for key, i in unique_index.items() if key not in duplicates]
+    remaining.extend(i for rows in duplicates.values() for i in rows)
+    remaining.sort()
+    matched = len(expected_rows)
+
+    # Without key columns, pair the rows that differ in content in order to report their cell differences
+    if by_content:
+        pairs = min(len(missing), len(remaining))
+        actual_rows.extend(remaining[:pairs])
+        expected_rows.extend(missing[:pairs])
+        missing, remaining = missing[pairs:], remaining[pairs:]
+
+    # Report the remaining rows
+    for i in missing:
+        name = str(i) if by_content else _label(expected_keys[i])
+        differences.append(Difference(expected=name, actual="", location=f"row={name}", message="Missing row."))
+    for i in remaining:
+        name = str(i) if by_content else _label(actual_keys[i])
+        differences.append(Difference(expected="", actual=name, location=f"row={name}", message="Additional row."))
+    return actual_rows, expected_rows, label, differences, matched if by_content else 0
+
+
+def _ragged_differences(
+    actual: _Table,
+    expected: _Table,
+    actual_rows: list[int],
+    expected_rows: list[int],
+    label: Callable[[int], str],
+    columns: list[str],
+) -> Iterator[Difference]:
+    """
+    Generates the differences of aligned rows whose width differs from the header: cells beyond the header (located
+    by their index) and missing cells of short rows (located by their column).
+    """
+    if not actual.ragged and not expected.ragged:
+        return
+    positions = [(column, actual.header.index(column), expected.header.index(column)) for column in columns]
+    for i, (a, e) in enumerate(zip(actual_rows, expected_rows)):
+        actual_row = actual.ragged.get(a)
+        expected_row = expected.ragged.get(e)
+        if actual_row is None and expected_row is None:
+            continue
+
+        # Cells beyond the header
+        actual_extra = actual_row[len(actual.header) :] if actual_row is not None else []
+        expected_extra = expected_row[len(expected.header) :] if expected_row is not None else []
+        for j in range(max(len(actual_extra), len(expected_extra))):
+            actual_value = actual_extra[j] if j < len(actual_extra) else None
+            expected_value = expected_extra[j] if j < len(expected_extra) else None
+            if actual_value == expected_value:
+                continue
+            message = "Difference in value."
+            if expected_value is None:
+                message = "Additional cell."
+            elif actual_value is None:
+                message = "Missing cell."
+            yield Difference(
+                expected=expected_value or "",
+                actual=actual_value or "",
+                location=f"row={label(i)},col={len(expected.header) + j}",
+                message=message,
+            )
+
+        # Missing cells of short rows (only where the padding hides them, other values differ anyway)
+        actual_width = len(actual_row) if actual_row is not None else len(actual.header)
+        expected_width = len(expected_row) if expected_row is not None else len(expected.header)
+        for column, actual_position, expected_position in positions:
+            actual_present = actual_position < actual_width
+            expected_present = expected_position < expected_width
+            if actual_present == expected_present:
+                continue
+            if actual.columns[column][a] == expected.columns[column][e] == "":
+                yield Difference(
+                    expected="",
+                    actual="",
+                    location=f"row={label(i)},col={column}",
+                    message="Additional cell." if actual_present else "Missing cell.",
+                )
+
+
+def _to_floats(values: list[str]) -> list[float]:
+    """
+    Converts values to floats (None if any value is not numeric).
+    """
+    try:
+        return [float(v) for v in values]
+    except ValueError:
+        return None
+
+
+def _mismatches(
+    actual_values: list[str],
+    expected_values: list[str],
+    tolerance: CsvTolerance = None,
+) -> list[int]:
+    """
+    Returns the positions at which the aligned values differ (vectorized with NumPy, if available).
+    """
+    if tolerance is not None:
+        if np is not None:
+            try:
+                a = np.asarray(actual_values, dtype=float)
+                e = np.asarray(expected_values, dtype=float)
+            except ValueError:
+                a = e = None
+            if a is not None:
+                close = np.abs(a - e) <= tolerance.absolute + tolerance.relative * np.abs(e)
+                close |= (a == e) | (np.isnan(a) & np.isnan(e))
+                return np.flatnonzero(~close).tolist()
+        else:
+            a = _to_floats(actual_values)
+            e = _to_floats(expected_values)
+            if a is not None and e is not None:
+                return [
+                    i
+                    for i, (x, y) in enumerate(zip(a, e))
+                    if not (
+                        x == y
+                        or abs(x - y) <= tolerance.absolute + tolerance.relative * abs(y)
+                        or (math.isnan(x) and math.isnan(y))
+                    )
+                ]
+        # Fall back to comparing the values individually if the column is not fully numeric
+        result = []
+        for i, (x, y) in enumerate(zip(actual_values, expected_values)):
+            if x == y:
+                continue
+            a, e = _to_floats([x, y]) or (None, None)
+            if a is None or not abs(a - e) <= tolerance.absolute + tolerance.relative * abs(e):
+                result.append(i)
+        return result
+
+    if np is not None:
+        return np.flatnonzero(
+            np.asarray(actual_values, dtype=object) != np.asarray(expected_values, dtype=object)
+        ).tolist()
+    return [i for i, (x, y) in enumerate(zip(actual_values, expected_values)) if x != y]
+
+
+def iter_csv_differences(
+    actual: Iterable[str],
+    expected: Iterable[str],
+    configuration: ConfigCompareCsv,
+) -> Iterator[Difference]:
+    """
+    Lazily generates the differences between two CSV tables column by column.
+
+    Parameters
+    ----------
+    actual : Iterable[str]
+        The lines of the actual table.
+    expected : Iterable[str]
+        The lines of the expected table.
+    configuration : ConfigCompareCsv
+        The comparison configuration.
+
+    Returns
+    -------
+    Iterator[Difference]
+        The differences with locations of the form 'row=<key or index>,col=<column>'.
+    """
+    actual_table = _Table(actual, configuration.delimiter)
+    expected_table = _Table(expected, configuration.delimiter)
+    ignores = set(configuration.ignore_columns)
+    tolerances = {t.column: t for t in configuration.tolerances}
+
+    # Columns cannot be told apart by duplicate names
+    if actual_table.duplicates or expected_table.duplicates:
+        for column in expected_table.duplicates:
+            yield Difference(expected=column, actual="", location=f"col={column}", message="Duplicate column.")
+        for column in actual_table.duplicates:
+            yield Difference(expected="", actual=column, location=f"col={column}", message="Duplicate column.")
+        return
+
+    # Compare the columns
+    for column in expected_table.header:
+        if column not in ignores and column not in actual_table.columns:
+            yield Difference(expected=column, actual="", location=f"col={column}", message="Missing column.")
+    for column in actual_table.header:
+        if column not in ignores and column not in expected_table.columns:
+            yield Difference(expected="", actual=column, location=f"col={column}", message="Additional column.")
+    columns = [c for c in expected_table.header if c not in ignores and c in actual_table.columns]
+
+    # Rows cannot be aligned without their key columns (differences of columns not reported above are added)
+    missing_keys = [
+        c for c in configuration.key_columns if c not in actual_table.columns or c not in expected_table.columns
+    ]
+    if missing_keys:
+        for column in missing_keys:
+            if column in ignores or (column in actual_table.columns) == (column in expected_table.columns):
+                yield Difference(expected=column, actual="", location=f"col={column}", message="Missing key column.")
+        return
+
+    # Align the rows
+    actual_rows, expected_rows, label, differences, identical = _align(
+        actual_table, expected_table, configuration, columns
+    )
+    yield from differences
+    yield from _ragged_differences(actual_table, expected_table, actual_rows, expected_rows, label, columns)
+
+    # Compare the aligned values column by column (skipping values already known to be equal from aligning)
+    for column in columns:
+        if column in configuration.key_columns:
+            continue
+        tolerance = tolerances.get(column)
+        start = identical if tolerance is None else 0
+        actual_column = actual_table.columns[column]
+        expected_column = expected_table.columns[column]
+        actual_values = [actual_column[i] for i in actual_rows[start:]]
+        expected_values = [expected_column[i] for i in expected_rows[start:]]
+        for i in _mismatches(actual_values, expected_values, tolerance):
+            yield Difference(
+                expected=expected_values[i],
+                actual=actual_values[i],
+                location=f"row={label(start + i)},col={column}",
+                message="Difference in value." if tolerance is None else "Difference beyond tolerance.",
+            )
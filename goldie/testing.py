@@ -1,13 +1,23 @@
-import glob
+import contextlib
+import dataclasses
 import inspect
 import json
 import os.path
+import shutil
+import sys
 import tempfile
 import unittest
 from dataclasses import dataclass, field
-
-from goldie.comparison import ComparisonType, ConfigComparison, compare, process
-from goldie.execution import ConfigRun, ConfigRunValidation, execute
+from typing import Any
+
+from goldie.comparison import ComparisonType, ConfigComparison, StringStreamComparer, compare, process
+from goldie.directory import ConfigCompareDirectory, compare_directories, update_directory
+from goldie.discovery import GOLDEN_BASELINE_SUFFIX, GOLDEN_DIRECTORY_SUFFIX, GOLDEN_SUFFIX, DiscoveryResult, discover
+from goldie.execution import ConfigRun, ConfigRunValidation, ExecutionResult, execute_with_result
+from goldie.history import HISTORY_DATABASE, record
+from goldie.isolation import create_working_directory, remove_async
+from goldie.performance import check_budgets, has_budgets, has_relative_budgets, load_baseline, save_baseline, summarize
+from goldie.profiling import capture_profile, should_profile
 from goldie.update import UPDATE
 
 
@@ -33,6 +43,14 @@ class ConfigFileTest:
     run_configuration: ConfigRun
     """The run configuration to use to run the command."""
     run_validation_configuration: ConfigRunValidation = field(default_factory=lambda: ConfigRunValidation())
+    directory_comparison_configuration: ConfigCompareDirectory = field(default_factory=ConfigCompareDirectory)
+    """The configuration for comparing the output directory (if the "{output_dir}" placeholder is used)."""
+    history_database: str = None
+    """
+    The SQLite database (relative to the test directory) to append the test outcome, duration, exit code, output size
+    and peak memory to. Defaults to the GOLDIE_HISTORY environment variable (relative to the working directory of the
+    process), no history is recorded if neither is set.
+    """
 
 
 @dataclass
@@ -45,6 +63,22 @@ class ConfigDirectoryTest:
     """The file filter to use to find test files."""
     explicit_tests: list[TestDefinition] = field(default_factory=list)
     """A list of explicit files to test."""
+    file_filters: list[str] = field(default_factory=list)
+    """Further file filters to use to find test files. '**' matches any number of directories."""
+    exclude_filters: list[str] = field(default_factory=list)
+    """File filters of files to exclude from the test files."""
+    discovery_index: str = None
+    """
+    Path to a discovery index file (relative to the test directory) caching directory listings between runs.
+    Directories whose mtime did not change are not listed again, which speeds up discovery in large trees.
+    """
+    report_orphans: bool = False
+    """Whether to fail on golden files without input file and (when not updating) input files without golden file."""
+    watch_paths: list[str] = field(default_factory=list)
+    """
+    File filters of further files the tests depend on (e.g., the tested script).
+    In watch mode ('python -m goldie watch'), all tests are rerun when one of them changes.
+    """
 
 
 def _get_golden_filename(path: str) -> str:
@@ -61,7 +95,72 @@ def _get_golden_filename(path: str) -> str:
     str
         The golden filename.
     """
-    return path + ".golden"
+    return path + GOLDEN_SUFFIX
+
+
+def _get_golden_dirname(path: str) -> str:
+    """
+    Get the golden directory name from a path.
+
+    Parameters
+    ----------
+    path : str
+        The path to get the golden directory name from.
+
+    Returns
+    -------
+    str
+        The golden directory name.
+    """
+    return path + GOLDEN_DIRECTORY_SUFFIX
+
+
+def _get_baseline_filename(path: str) -> str:
+    """
+    Get the performance baseline filename from a path.
+
+    Parameters
+    ----------
+    path : str
+        The path to get the baseline filename from.
+
+    Returns
+    -------
+    str
+        The baseline filename.
+    """
+    return path + GOLDEN_BASELINE_SUFFIX
+
+
+def _output_directory(configuration: ConfigRun):
+    """
+    Get a context providing a temporary output directory, if the run configuration uses the "{output_dir}"
+    placeholder (None otherwise).
+    """
+    if any("{output_dir}" in arg for arg in configuration.args):
+        return tempfile.TemporaryDirectory()
+    return contextlib.nullcontext()
+
+
+def _isolated_run_configuration(
+    td: TestDefinition,
+    root_directory: str,
+    configuration: ConfigFileTest,
+) -> tuple[ConfigRun, str]:
+    """
+    Get the run configuration for a run of the test in a fresh working directory cloned from the fixture, if
+    isolation is configured.
+
+    Returns
+    -------
+    tuple[ConfigRun, str]
+        The run configuration and the working directory (the unchanged configuration and None if not isolated).
+    """
+    run_configuration = configuration.run_configuration
+    if run_configuration.isolation is None:
+        return run_configuration, None
+    working_directory = create_working_directory(td.input_file, root_directory, run_configuration.isolation)
+    return dataclasses.replace(run_configuration, cwd=working_directory), working_directory
 
 
 def _get_caller_directory():
@@ -83,10 +182,178 @@ def _get_caller_directory():
     raise ValueError("Unable to determine the caller directory.")
 
 
+def _format_message(message: str, differences: list) -> str:
+    """
+    Appends the differences (if any) to the comparison message.
+    """
+    if differences:
+        message += "\n" + "\n".join([f"{d.location}: {d.message} ({d.expected} != {d.actual})" for d in differences])
+    return message
+
+
+def _validate_run(
+    test: unittest.TestCase,
+    td: TestDefinition,
+    configuration: ConfigFileTest,
+    result: ExecutionResult,
+    output_file: Any,
+    output_dir: str,
+    comparer: StringStreamComparer,
+    update: bool,
+):
+    """
+    Validate the outcome of a command run against the golden files (or update them).
+
+    Parameters
+    ----------
+    test : unittest.TestCase
+        The test case to run.
+    td : TestDefinition
+        The test definition.
+    configuration : ConfigFileTest
+        The configuration for the golden file test.
+    result : ExecutionResult
+        The result of the command.
+    output_file : Any
+        The open output file.
+    output_dir : str
+        The output directory (if the command uses one).
+    comparer : StringStreamComparer
+        The comparer that compared the output while the command was running, if any.
+    update : bool
+        Whether to update the golden files instead of comparing against them.
+    """
+
+    golden_file = _get_golden_filename(td.input_file)
+    exit_code = result.exit_code
+
+    # The command was killed on the first mismatch, report it right away
+    if result.aborted:
+        _, message = comparer.finish()
+        test.fail(f"Command aborted on first mismatch. {message}")
+
+    # Assert the exit code
+    if configuration.run_validation_configuration.validate_exit_code:
+        test.assertEqual(
+            exit_code,
+            configuration.run_validation_configuration.expected_exit_code,
+            f"Expected exit code {configuration.run_validation_configuration.expected_exit_code}"
+            + f", but got {exit_code}. Output: {output_file.read()}",
+        )
+
+    # Compare the output directory, if any
+    if output_dir is not None:
+        golden_directory = _get_golden_dirname(td.input_file)
+        if update:
+            update_directory(output_dir, golden_directory, configuration.directory_comparison_configuration)
+        else:
+            equal, message, differences = compare_directories(
+                output_dir, golden_directory, configuration.directory_comparison_configuration
+            )
+            test.assertTrue(equal, _format_message(message, differences))
+
+    # If no output comparison is desired, skip the rest
+    if configuration.comparison_configuration.comparison_type == ComparisonType.IGNORE:
+        return
+
+    # The comparison already happened while the command was running
+    if comparer:
+        equal, message = comparer.finish()
+        test.assertTrue(equal, message)
+        return
+
+    # Process the file
+    process(output_file.name, configuration.comparison_configuration)
+
+    # Update the golden file if necessary
+    if update:
+        if configuration.comparison_configuration.comparison_type == ComparisonType.JSON:
+            try:
+                with open(golden_file, "w") as f:
+                    f.write(json.dumps(json.load(output_file), indent=4))
+            except json.JSONDecodeError as e:
+                raise ValueError("Failed to decode JSON from output file") from e
+        else:
+            shutil.copyfile(output_file.name, golden_file)
+        return
+
+    # Compare the actual and golden files
+    equal, message, differences = compare(output_file.name, golden_file, configuration.comparison_configuration)
+    # Assert the comparison
+    test.assertTrue(equal, _format_message(message, differences))
+
+
+def _validate_budgets(
+    test: unittest.TestCase,
+    td: TestDefinition,
+    configuration: ConfigFileTest,
+    result: ExecutionResult,
+    root_directory: str,
+    update: bool,
+):
+    """
+    Repeat the command as configured and validate its performance against the budgets (or update the baseline).
+
+    Parameters
+    ----------
+    test : unittest.TestCase
+        The test case to run.
+    td : TestDefinition
+        The test definition.
+    configuration : ConfigFileTest
+        The configuration for the golden file test.
+    result : ExecutionResult
+        The result of the first run of the command.
+    root_directory : str
+        The directory to run the command in.
+    update : bool
+        Whether to update the baseline instead of validating against it.
+    """
+
+    validation = configuration.run_validation_configuration
+    if not has_budgets(validation):
+        return
+
+    # Repeat the command to damp noise (each time in a fresh working directory, if isolated)
+    results = [result]
+    for _ in range(validation.repetitions - 1):
+        run_configuration, working_directory = _isolated_run_configuration(td, root_directory, configuration)
+        output_directory = _output_directory(run_configuration)
+        try:
+            with tempfile.NamedTemporaryFile("w+") as output_file, output_directory as output_dir:
+                results.append(
+                    execute_with_result(
+                        input_file=td.input_file,
+                        output_file=output_file.name,
+                        cwd=root_directory,
+                        configuration=run_configuration,
+                        extra_args=td.extra_args,
+                        output_dir=output_dir,
+                    )
+                )
+        finally:
+            if working_directory is not None:
+                remove_async(working_directory)
+
+    # Update the baseline if necessary
+    baseline_file = _get_baseline_filename(td.input_file)
+    if update:
+        if has_relative_budgets(validation):
+            save_baseline(baseline_file, summarize(results, validation))
+        return
+
+    # Assert the budgets
+    failures = check_budgets(results, validation, load_baseline(baseline_file))
+    if failures:
+        test.fail("\n".join(failures))
+
+
 def run_file_unittest(
     test: unittest.TestCase,
     td: TestDefinition,
     configuration: ConfigFileTest,
+    root_directory: str = None,
+    update: bool = None,
 ):
     """
     Run the golden file test.
@@ -99,67 +366,126 @@ def run_file_unittest(
         The input file to use for the test.
     configuration : ConfigFileTest
         The configuration for the golden file test.
+    root_directory : str, optional
+        The directory to run the command in, by default the directory of the calling test file.
+    update : bool, optional
+        Whether to update the golden files, by default according to the GOLDIE_UPDATE environment variable.
     """
 
     # Determine the root directory
-    root_directory = _get_caller_directory()
-
-    with tempfile.NamedTemporaryFile("w+") as output_file:
-        # Get the golden file
-        golden_file = _get_golden_filename(td.input_file)
-
-        # Run the command
-        exit_code = execute(
-            input_file=td.input_file,
-            output_file=output_file.name,
-            cwd=root_directory,
-            configuration=configuration.run_configuration,
-            extra_args=td.extra_args,
-        )
-
-        # Assert the exit code
-        if configuration.run_validation_configuration.validate_exit_code:
-            test.assertEqual(
-                exit_code,
-                configuration.run_validation_configuration.expected_exit_code,
-                f"Expected exit code {configuration.run_validation_configuration.expected_exit_code}"
-                + f", but got {exit_code}. Output: {output_file.read()}",
+    root_directory = root_directory or _get_caller_directory()
+    update = UPDATE if update is None else update
+    history_database = HISTORY_DATABASE
+    if configuration.history_database:
+        history_database = os.path.join(root_directory, configuration.history_database)
+
+    # Run in a working directory of its own cloned from the fixture, if desired
+    if configuration.run_configuration.isolation is not None:
+        td = dataclasses.replace(td, input_file=os.path.abspath(td.input_file))
+    run_configuration, working_directory = _isolated_run_configuration(td, root_directory, configuration)
+
+    output_directory = _output_directory(run_configuration)
+    with tempfile.NamedTemporaryFile("w+") as output_file, output_directory as output_dir:
+        # Compare while the command is running, if desired
+        comparer = None
+        comparison_configuration = configuration.comparison_configuration
+        if (
+            comparison_configuration.comparison_type == ComparisonType.STRING
+            and comparison_configuration.string_comparison_config.streaming
+            and not update
+        ):
+            comparer = StringStreamComparer(_get_golden_filename(td.input_file), comparison_configuration)
+
+        result = None
+        passed = False
+        try:
+            # Run the command
+            result = execute_with_result(
+                input_file=td.input_file,
+                output_file=output_file.name,
+                cwd=root_directory,
+                configuration=run_configuration,
+                extra_args=td.extra_args,
+                line_callback=comparer.feed if comparer else None,
+                output_dir=output_dir,
             )
 
-        # If no output comparison is desired, skip the rest
-        if configuration.comparison_configuration.comparison_type == ComparisonType.IGNORE:
-            return
-
-        # Process the file
-        process(output_file.name, configuration.comparison_configuration)
-
-        # Update the golden file if necessary
-        if UPDATE:
-            if configuration.comparison_configuration.comparison_type == ComparisonType.JSON:
-                try:
-                    with open(golden_file, "w") as f:
-                        f.write(json.dumps(json.load(output_file), indent=4))
-                except json.JSONDecodeError as e:
-                    raise ValueError("Failed to decode JSON from output file") from e
-            else:
-                with open(golden_file, "w") as f:
-                    f.write(output_file.read())
-            return
-
-        # Compare the actual and golden files
-        equal, message, differences = compare(output_file.name, golden_file, configuration.comparison_configuration)
-        # Prepare the message
-        if differences:
-            message += "\n" + "\n".join(
-                [f"{d.location}: {d.message} ({d.expected} != {d.actual})" for d in differences]
-            )
-        # Assert the comparison
-        test.assertTrue(equal, message)
+            # Validate the outcome
+            _validate_run(test, td, configuration, result, output_file, output_dir, comparer, update)
+            _validate_budgets(test, td, configuration, result, root_directory, update)
+            passed = True
+        finally:
+            if comparer:
+                comparer.close()
+            # Capture a profile of slow or failing commands (in a fresh working directory), if desired
+            if should_profile(run_configuration.profile, passed, result):
+                profile_configuration, profile_directory = _isolated_run_configuration(
+                    td, root_directory, configuration
+                )
+                message = capture_profile(
+                    td.input_file, root_directory, profile_configuration, td.extra_args, result.duration
+                )
+                if profile_directory is not None:
+                    remove_async(profile_directory)
+                sys.stderr.write(message + "\n")
+            # Record the outcome in the history, if desired
+            if history_database:
+                relative_input_file = os.path.relpath(os.path.join(root_directory, td.input_file), root_directory)
+                record(history_database, relative_input_file, passed, result)
+            # Remove the working directory in the background, unless kept for inspection
+            if working_directory is not None:
+                if passed or not run_configuration.isolation.keep_on_failure:
+                    remove_async(working_directory)
+                else:
+                    sys.stderr.write(f"Working directory of {td.input_file} kept at {working_directory}\n")
+
+
+def discover_tests(
+    configuration: ConfigDirectoryTest,
+    root_directory: str,
+    cache: dict = None,
+) -> tuple[DiscoveryResult, list[TestDefinition]]:
+    """
+    Discover the tests of a directory test.
+
+    Parameters
+    ----------
+    configuration : ConfigDirectoryTest
+        The configuration for the golden file test.
+    root_directory : str
+        The directory the file filters are relative to.
+    cache : dict, optional
+        An in-memory cache of the directory listings to reuse between calls.
+
+    Returns
+    -------
+    tuple[DiscoveryResult, list[TestDefinition]]
+        The discovered files and the test definitions (discovered and explicit ones).
+    """
+    # Find files from file filters
+    file_filters = list(configuration.file_filters)
+    if configuration.file_filter is not None:
+        file_filters.insert(0, configuration.file_filter)
+    discovery = discover(
+        root_directory,
+        include=file_filters,
+        exclude=configuration.exclude_filters,
+        index_file=os.path.join(root_directory, configuration.discovery_index)
+        if configuration.discovery_index
+        else None,
+        cache=cache,
+    )
+
+    # Convert to test definitions
+    test_files = [TestDefinition(input_file) for input_file in discovery.input_files]
+    test_files.extend(configuration.explicit_tests)
+    return discovery, test_files
 
 
 def run_directory_unittest(
     test: unittest.TestCase,
     configuration: ConfigDirectoryTest,
+    root_directory: str = None,
 ):
     """
     Run the golden file test.
@@ -170,23 +496,23 @@ def run_directory_unittest(
         The test case to run.
     configuration : ConfigDirectoryTest
         The configuration for the golden file test.
+    root_directory : str, optional
+        The directory the file filters are relative to, by default the directory of the calling test file.
     """
 
     # Determine the root directory
-    root_directory = _get_caller_directory()
+    root_directory = root_directory or _get_caller_directory()
+    discovery, test_files = discover_tests(configuration, root_directory)
 
-    # Find files from file filter
-    filter_files = []
-    if configuration.file_filter is not None:
-        filter_files = glob.glob(os.path.join(root_directory, configuration.file_filter))
-        # Remove any golden files
-        filter_files = [f for f in filter_files if not f.endswith(".golden")]
-
-    # Convert to test definitions
-    test_files = [TestDefinition(input_file) for input_file in filter_files]
-    test_files.extend(configuration.explicit_tests)
+    # Report inconsistencies between inputs and goldens
+    if configuration.report_orphans:
+        with test.subTest("Orphaned golden files"):
+            test.assertFalse(discovery.orphaned_goldens, "Golden files without input file found.")
+        if not UPDATE:
+            with test.subTest("Missing golden files"):
+                test.assertFalse(discovery.missing_goldens, "Input files without golden file found.")
 
     # Iterate over the test cases
     for i, td in enumerate(test_files):
         with test.subTest(f"Test {i}"):
-            run_file_unittest(test, td, configuration.config_file_test)
+            run_file_unittest(test, td, configuration.config_file_test, root_directory=root_directory)
@@ -0,0 +1,27 @@
+import os
+
+
+def write_file(directory: str, relative_path: str, content: str = "") -> str:
+    """
+    Writes a file (and its directories) below the given directory and returns its path.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to write the file to.
+    relative_path : str
+        The path of the file relative to the directory.
+    content : str, optional
+        The content of the file, by default empty.
+
+    Returns
+    -------
+    str
+        The full path to the file.
+    """
+
+    path = os.path.join(directory, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+    return path
@@ -0,0 +1,202 @@
+import json
+import re
+import tempfile
+import unittest
+
+import goldie
+from goldie.tests import write_file
+
+
+class TestStringStreamComparer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_equal(self):
+        config = goldie.ConfigComparison(
+            string_processing_config=goldie.ConfigProcessString(
+                regex_replacements=[goldie.RegexReplacement(pattern=r"\d", replacement="0")]
+            ),
+        )
+        golden = write_file(self.directory.name, "golden", "a 0\nb 0\n")
+        comparer = goldie.StringStreamComparer(golden, config)
+        self.assertTrue(comparer.feed("a 1\n"))
+        self.assertTrue(comparer.feed("b 2\n"))
+        self.assertEqual(comparer.finish(), (True, "Content is equal."))
+
+    def test_mismatch(self):
+        golden = write_file(self.directory.name, "golden", "".join(f"{i}\n" for i in range(20)))
+        config = goldie.ConfigComparison(
+            string_comparison_config=goldie.ConfigCompareString(abort_on_mismatch=True),
+        )
+        comparer = goldie.StringStreamComparer(golden, config)
+        self.assertTrue(comparer.feed("0\n"))
+        self.assertFalse(comparer.feed("x\n"))
+        equal, message = comparer.finish()
+        self.assertFalse(equal)
+        self.assertTrue(message.startswith("First mismatch at line 2"))
+        self.assertNotIn("10", re.sub(r"\x1b\[[\d\;]+m", "", message))
+
+    def test_missing_lines(self):
+        golden = write_file(self.directory.name, "golden", "a\nb\n")
+        comparer = goldie.StringStreamComparer(golden, goldie.ConfigComparison())
+        self.assertTrue(comparer.feed("a\n"))
+        equal, message = comparer.finish()
+        self.assertFalse(equal)
+        self.assertTrue(message.startswith("First mismatch at line 2"))
+
+
+class TestStreamingCompare(unittest.TestCase):
+    def test_process_and_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            lines = [f"{i} took 0.{i}s\n" for i in range(10000)]
+            actual = write_file(directory, "actual", "".join(lines))
+            lines[5000] = "changed\n"
+            golden = write_file(directory, "golden", "".join(lines).replace("took 0.", "took X."))
+            config = goldie.ConfigComparison(
+                string_processing_config=goldie.ConfigProcessString(
+                    regex_replacements=[goldie.RegexReplacement(pattern=r"took \d+\.", replacement="took X.")]
+                ),
+                string_comparison_config=goldie.ConfigCompareString(
+                    diff_style=goldie.DiffStyle.UNIFIED,
+                    streaming=True,
+                ),
+            )
+
+            goldie.process(actual, config)
+            with open(actual) as f:
+                self.assertEqual(f.readline(), "0 took X.0s\n")
+
+            equal, message, _ = goldie.compare(actual, golden, config)
+            self.assertFalse(equal)
+            self.assertTrue(message.startswith("First mismatch at line 5001"))
+            self.assertLess(len(message.split("\n")), 20)
+
+
+class TestCompareJson(unittest.TestCase):
+    def test_max_differences(self):
+        expected = {"items": [{"price": i, "name": "x"} for i in range(1000)]}
+        actual = {"items": [{"price": i + 1, "name": "x"} for i in range(1000)]}
+        config = goldie.ConfigCompareJson(max_differences=5)
+
+        equal, differences = goldie.compare_json(actual, expected, config)
+        self.assertFalse(equal)
+        self.assertEqual(len(differences), 5)
+        self.assertEqual(differences[0].location, "$.items[0].price")
+
+        differences, total, summary = goldie.collect_differences(
+            goldie.iter_json_differences(actual, expected, config), config.max_differences
+        )
+        self.assertEqual(total, 1000)
+        self.assertIn("Showing 5 of 1,000 differences", summary)
+        self.assertIn("$.items[*].price: Difference in value. (1,000 occurrences)", summary)
+
+    def test_summary_only(self):
+        config = goldie.ConfigCompareJson(max_differences=0)
+        equal, differences = goldie.compare_json({"a": 1}, {"a": 2}, config)
+        self.assertFalse(equal)
+        self.assertEqual(differences, [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            actual = write_file(directory, "actual", '{"a": 1}')
+            golden = write_file(directory, "golden", '{"a": 2}')
+            equal, message, differences = goldie.compare(
+                actual,
+                golden,
+                goldie.ConfigComparison(comparison_type=goldie.ComparisonType.JSON, json_comparison_config=config),
+            )
+        self.assertFalse(equal)
+        self.assertEqual(differences, [])
+        self.assertIn("Showing 0 of 1 differences", message)
+        self.assertIn("$.a: Difference in value. (1 occurrences)", message)
+
+    def test_allow_missing_keys(self):
+        config = goldie.ConfigCompareJson(allow_missing_keys=True)
+        equal, differences = goldie.compare_json({"a": 1}, {"a": 1, "b": 2}, config)
+        self.assertTrue(equal)
+        self.assertEqual(differences, [])
+
+
+class TestCompareJsonl(unittest.TestCase):
+    def test_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            actual = write_file(directory, "actual", '{"id": 1, "ts": 5.123}\n\n{"id": 2, "ts": 7}\n{"id": 3}\n')
+            golden = write_file(directory, "golden", '{"id": 1, "ts": 0}\n{"id": 3, "ts": 0}\n')
+            config = goldie.ConfigComparison(
+                comparison_type=goldie.ComparisonType.JSONL,
+                json_processing_config=goldie.ConfigProcessJson(
+                    replacements=[goldie.JsonReplacement(path="$.ts", value=0)]
+                ),
+            )
+
+            goldie.process(actual, config)
+            with open(actual) as f:
+                self.assertEqual(f.read(), '{"id": 1, "ts": 0}\n{"id": 2, "ts": 0}\n{"id": 3, "ts": 0}\n')
+
+            equal, _, differences = goldie.compare(actual, golden, config)
+            self.assertFalse(equal)
+            self.assertEqual(
+                [(d.location, d.message) for d in differences],
+                [
+                    ("$[1].id", "Difference in value."),
+                    ("$[2]", "Additional record."),
+                ],
+            )
+
+    def test_keyed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            records = [f'{{"id": "r{i}", "value": {i}}}\n' for i in range(1000)]
+            golden = write_file(directory, "golden", "".join(records))
+            records.reverse()
+            records[0] = '{"id": "r999", "value": -1}\n'
+            records[1] = '{"id": "new", "value": 0}\n'
+            actual = write_file(directory, "actual", "".join(records))
+            config = goldie.ConfigComparison(
+                comparison_type=goldie.ComparisonType.JSONL,
+                jsonl_comparison_config=goldie.ConfigCompareJsonl(key_path="$.id"),
+            )
+
+            equal, message, differences = goldie.compare(actual, golden, config)
+            self.assertFalse(equal)
+            self.assertEqual(
+                [(d.location, d.message) for d in differences],
+                [
+                    ('$[key="r999"].value', "Difference in value."),
+                    ('$[key="new"]', "Additional record."),
+                    ('$[key="r998"]', "Missing record."),
+                ],
+            )
+
+            equal, _, _ = goldie.compare(golden, golden, config)
+            self.assertTrue(equal)
+
+    def test_keyed_missing_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            golden = write_file(directory, "golden", "".join(f'{{"id": {i}}}\n' for i in [5, 3, 9, 1, 7]))
+            actual = write_file(directory, "actual", '{"id": 9}\n')
+            config = goldie.ConfigComparison(
+                comparison_type=goldie.ComparisonType.JSONL,
+                jsonl_comparison_config=goldie.ConfigCompareJsonl(key_path="$.id"),
+            )
+            _, _, differences = goldie.compare(actual, golden, config)
+            self.assertEqual([d.location for d in differences], [f"$[key={i}]" for i in [5, 3, 1, 7]])
+
+    def test_json_decoder(self):
+        with tempfile.TemporaryDirectory() as directory:
+            golden = write_file(directory, "golden", '{"id": 1, "value": 1.0}\n')
+            actual = write_file(directory, "actual", '{"id": 1, "value": 1.0}\n')
+            decoded = []
+
+            def decoder(text: str):
+                decoded.append(text)
+                return json.loads(text)
+
+            for key_path in [None, "$.id"]:
+                config = goldie.ConfigComparison(
+                    comparison_type=goldie.ComparisonType.JSONL,
+                    jsonl_comparison_config=goldie.ConfigCompareJsonl(key_path=key_path),
+                )
+                equal, _, _ = goldie.compare(actual, golden, config, json_decoder=decoder)
+                self.assertTrue(equal)
+            # Both sides are decoded with the decoder (the golden one twice when indexing by key)
+            self.assertEqual(len(decoded), 5)
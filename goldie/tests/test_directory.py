@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+
+import goldie
+from goldie.tests import write_file
+
+
+class TestCompareDirectories(unittest.TestCase):
+    def test_compare(self):
+        with tempfile.TemporaryDirectory() as actual, tempfile.TemporaryDirectory() as golden:
+            write_file(actual, "a.txt", "a")
+            write_file(actual, "sub/b.json", '{"x": 1, "t": 5}')
+            write_file(actual, "new.txt")
+            write_file(actual, "log.txt", "1")
+            write_file(golden, "a.txt", "a")
+            write_file(golden, "sub/b.json", '{"x": 2, "t": 3}')
+            write_file(golden, "gone.txt")
+            write_file(golden, "log.txt", "2")
+            config = goldie.ConfigCompareDirectory(
+                comparisons=[
+                    goldie.DirectoryComparison(
+                        "**/*.json",
+                        goldie.ConfigComparison(
+                            comparison_type=goldie.ComparisonType.JSON,
+                            json_comparison_config=goldie.ConfigCompareJson(ignores=["$.t"]),
+                        ),
+                    ),
+                    goldie.DirectoryComparison("log.txt", goldie.ConfigComparison(goldie.ComparisonType.IGNORE)),
+                ],
+            )
+
+            equal, _, differences = goldie.compare_directories(actual, golden, config)
+            self.assertFalse(equal)
+            self.assertEqual(
+                [(d.location, d.message) for d in differences],
+                [
+                    ("gone.txt", "Missing file."),
+                    ("new.txt", "Additional file."),
+                    ("sub/b.json", "Content is not equal."),
+                    ("sub/b.json:$.x", "Difference in value."),
+                ],
+            )
+
+    def test_ignored_files(self):
+        with tempfile.TemporaryDirectory() as actual, tempfile.TemporaryDirectory() as golden:
+            write_file(actual, "out.txt", "a")
+            write_file(actual, "logs/run-123.log", "1")
+            write_file(golden, "out.txt", "a")
+            write_file(golden, "logs/run-456.log", "2")
+            config = goldie.ConfigCompareDirectory(
+                comparisons=[
+                    goldie.DirectoryComparison("logs/**", goldie.ConfigComparison(goldie.ComparisonType.IGNORE))
+                ],
+            )
+            self.assertEqual(goldie.compare_directories(actual, golden, config), (True, "Content is equal.", []))
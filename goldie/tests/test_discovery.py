@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import goldie.discovery
+from goldie.tests import write_file
+
+
+class TestPatterns(unittest.TestCase):
+    def test_translate(self):
+        cases = [
+            ("data/*.json", "data/a.json", True),
+            ("data/*.json", "data/sub/a.json", False),
+            ("data/*.json", "data/.a.json", False),
+            ("data/**/*.json", "data/a.json", True),
+            ("data/**/*.json", "data/sub/deeper/a.json", True),
+            ("**", "a/b/c.txt", True),
+            ("data/[ab].txt", "data/b.txt", True),
+            ("data/[!ab].txt", "data/b.txt", False),
+            ("data/?.txt", "data/ab.txt", False),
+        ]
+        for pattern, path, expected in cases:
+            with self.subTest(f"{pattern} {path}"):
+                self.assertEqual(bool(goldie.discovery.translate_pattern(pattern).match(path)), expected)
+
+
+class TestDiscover(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = self.directory.name
+        for path in [
+            "data/a.json",
+            "data/a.json.golden",
+            "data/b.json",
+            "data/gone.json.golden",
+            "data/sub/c.json",
+            "data/sub/c.json.golden",
+            "data/sub/skip.json",
+            "other/d.json",
+        ]:
+            write_file(self.root, path)
+
+    def test_discover(self):
+        result = goldie.discovery.discover(self.root, ["data/**/*.json"], exclude=["**/skip.json"])
+        relative = [os.path.relpath(f, self.root).replace(os.sep, "/") for f in result.input_files]
+        self.assertEqual(relative, ["data/a.json", "data/b.json", "data/sub/c.json"])
+        self.assertEqual(result.missing_goldens, [os.path.join(self.root, "data/b.json")])
+        self.assertEqual(result.orphaned_goldens, [os.path.join(self.root, "data/gone.json.golden")])
+
+    def test_absolute_pattern(self):
+        pattern = os.path.join(self.root, "data", "*.json")
+        result = goldie.discovery.discover(os.path.join(self.root, "other"), [pattern])
+        self.assertEqual(
+            result.input_files, [os.path.join(self.root, "data", "a.json"), os.path.join(self.root, "data", "b.json")]
+        )
+        self.assertEqual(result.orphaned_goldens, [os.path.join(self.root, "data", "gone.json.golden")])
+
+    def test_golden_directory(self):
+        write_file(self.root, "data/b.json.golden.d/out.txt")
+        write_file(self.root, "data/removed.json.golden.d/out.txt")
+        result = goldie.discovery.discover(self.root, ["data/*.json"])
+        self.assertEqual(result.missing_goldens, [])
+        self.assertEqual(result.files[1].golden_file, os.path.join(self.root, "data", "b.json.golden.d"))
+        self.assertIn(os.path.join(self.root, "data", "removed.json.golden.d"), result.orphaned_goldens)
+
+    def test_index(self):
+        index_file = os.path.join(self.root, ".goldie", "index.json")
+        first = goldie.discovery.discover(self.root, ["data/*.json"], index_file=index_file)
+        self.assertTrue(os.path.isfile(index_file))
+        second = goldie.discovery.discover(self.root, ["data/*.json"], index_file=index_file)
+        self.assertEqual(first, second)
+
+        # New files are picked up, since the directory mtime changes
+        write_file(self.root, "data/e.json")
+        third = goldie.discovery.discover(self.root, ["data/*.json"], index_file=index_file)
+        self.assertIn(os.path.join(self.root, "data/e.json"), third.input_files)
+
+    def test_cache(self):
+        # Backdate the directories, recently modified ones are always listed again
+        for directory in ["", "data", "data/sub"]:
+            os.utime(os.path.join(self.root, directory), (0, 0))
+        cache = {}
+        first = goldie.discovery.discover(self.root, ["data/**/*.json"], cache=cache)
+        self.assertEqual(sorted(cache), ["data", "data/sub"])
+        with mock.patch("os.scandir", side_effect=AssertionError("listed again")):
+            second = goldie.discovery.discover(self.root, ["data/**/*.json"], cache=cache)
+        self.assertEqual(first, second)
+
+    def test_hidden_directories(self):
+        write_file(self.root, ".goldie/work/input-1/data/a.json")
+        write_file(self.root, "data/.cache/e.json")
+        cache = {}
+        result = goldie.discovery.discover(self.root, ["**/*.json"], exclude=["**/skip.json"], cache=cache)
+        self.assertEqual(len(result.input_files), 4)
+        self.assertEqual(sorted(cache), ["", "data", "data/sub", "other"])
+
+        # Hidden directories named explicitly are still walked
+        result = goldie.discovery.discover(self.root, ["data/.cache/*.json", "*/.cache/*.json"])
+        self.assertEqual(result.input_files, [os.path.join(self.root, "data", ".cache", "e.json")])
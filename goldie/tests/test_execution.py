@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import goldie
+
+
+def _shout(stdin, stdout, args):
+    stdout.write(stdin.read().upper())
+    print(" ".join(args), file=sys.stderr)
+    return 3
+
+
+def _fail(stdin, stdout, args):
+    raise RuntimeError("boom")
+
+
+def _done(stdin, stdout, args):
+    return "done"
+
+
+class TestExecute(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input_file = os.path.join(self.directory.name, "input")
+        self.output_file = os.path.join(self.directory.name, "output")
+        with open(self.input_file, "w") as f:
+            f.write("hello\n")
+
+    def _output(self) -> str:
+        with open(self.output_file) as f:
+            return f.read()
+
+    def test_abort(self):
+        script = "import time\nprint('first', flush=True)\ntime.sleep(30)\nprint('second')\n"
+        result = goldie.execute_with_result(
+            input_file=None,
+            output_file=self.output_file,
+            cwd=self.directory.name,
+            configuration=goldie.ConfigRun(cmd=sys.executable, args=["-c", script], input_mode=goldie.InputMode.NONE),
+            line_callback=lambda line: line != "first\n",
+        )
+        self.assertTrue(result.aborted)
+        self.assertEqual(self._output(), "first\n")
+
+    def test_callback_error(self):
+        marker = os.path.join(self.directory.name, "marker")
+        script = f"import time\nprint('first', flush=True)\ntime.sleep(0.5)\nopen({marker!r}, 'w').close()\n"
+
+        def callback(line: str) -> bool:
+            raise UnicodeDecodeError("utf-8", b"", 0, 1, "invalid")
+
+        with self.assertRaises(UnicodeDecodeError):
+            goldie.execute_with_result(
+                input_file=None,
+                output_file=self.output_file,
+                cwd=self.directory.name,
+                configuration=goldie.ConfigRun(
+                    cmd=sys.executable, args=["-c", script], input_mode=goldie.InputMode.NONE
+                ),
+                line_callback=callback,
+            )
+        # The command was killed instead of running on
+        time.sleep(1)
+        self.assertFalse(os.path.exists(marker))
+
+    def test_callable(self):
+        for isolate in [False, True]:
+            with self.subTest(isolate=isolate):
+                exit_code = goldie.execute(
+                    input_file=self.input_file,
+                    output_file=self.output_file,
+                    cwd=self.directory.name,
+                    configuration=goldie.ConfigRun(
+                        func=_shout,
+                        args=["{input}"],
+                        output_mode=goldie.OutputMode.BOTH,
+                        isolate=isolate,
+                    ),
+                )
+                self.assertEqual(exit_code, 3)
+                self.assertEqual(self._output(), f"HELLO\n{self.input_file}\n")
+
+    def test_callable_exception(self):
+        exit_code = goldie.execute(
+            input_file=self.input_file,
+            output_file=self.output_file,
+            cwd=self.directory.name,
+            configuration=goldie.ConfigRun(func=_fail, output_mode=goldie.OutputMode.STDERR),
+        )
+        self.assertEqual(exit_code, 1)
+        self.assertIn("RuntimeError: boom", self._output())
+
+    def test_callable_non_int(self):
+        exit_code = goldie.execute(
+            input_file=self.input_file,
+            output_file=self.output_file,
+            cwd=self.directory.name,
+            configuration=goldie.ConfigRun(func=_done, output_mode=goldie.OutputMode.STDERR),
+        )
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(self._output(), "done\n")
+
+    @unittest.skipUnless(goldie.launcher.SUPPORTED, "requires the launcher")
+    def test_peak_memory(self):
+        # Memory of the test process must not count towards the command
+        allocation = b"x" * (512 * 1024**2)
+        result = goldie.execute_with_result(
+            input_file=self.input_file,
+            output_file=self.output_file,
+            cwd=self.directory.name,
+            configuration=goldie.ConfigRun(cmd="true", input_mode=goldie.InputMode.NONE),
+        )
+        del allocation
+        self.assertEqual(result.exit_code, 0)
+        self.assertLess(result.peak_memory, 64 * 1024**2)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import goldie
+import goldie.history
+from goldie.tests import write_file
+
+
+def _copy(stdin, stdout, args):
+    stdout.write(stdin.read())
+
+
+class TestHistory(unittest.TestCase):
+    def test_record_and_query(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "history.db")
+            for run_id, durations in [("base", [1.0, 2.0]), ("head", [1.0, 4.0])]:
+                for input_file, duration in zip(["a.json", "b.json"], durations):
+                    goldie.history.record(
+                        database,
+                        input_file,
+                        passed=input_file == "a.json",
+                        result=goldie.ExecutionResult(exit_code=0, duration=duration, output_size=10),
+                        run_id=run_id,
+                    )
+
+            runs = goldie.history.runs(database)
+            self.assertEqual(
+                [(r.run_id, r.tests, r.failures, r.duration) for r in runs], [("head", 2, 1, 5.0), ("base", 2, 1, 3.0)]
+            )
+
+            trend = goldie.history.trend(database, "b.json")
+            self.assertEqual([e.duration for e in trend], [2.0, 4.0])
+            self.assertFalse(trend[0].passed)
+
+            self.assertEqual(goldie.history.percentiles(database, "b.json", (50,)), {"b.json": {50: 3.0}})
+
+            slowdowns = goldie.history.slowdowns(database, "base", "head")
+            self.assertEqual(slowdowns[0].input_file, "b.json")
+            self.assertEqual(slowdowns[0].ratio, 2.0)
+
+    def test_relative_input_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_file = write_file(directory, "data/input.txt", "a\n")
+            write_file(directory, "data/input.txt.golden", "a\n")
+            configuration = goldie.ConfigFileTest(
+                run_configuration=goldie.ConfigRun(func=_copy),
+                comparison_configuration=goldie.ConfigComparison(),
+                history_database="history.db",
+            )
+            goldie.run_file_unittest(self, goldie.TestDefinition(input_file), configuration, directory)
+
+            # Tests are recorded relative to the test directory
+            (entry,) = goldie.history.trend(os.path.join(directory, "history.db"), "./data/input.txt")
+            self.assertEqual(entry.input_file, "data/input.txt")
+            self.assertTrue(entry.passed)
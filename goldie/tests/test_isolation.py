@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import goldie
+from goldie import isolation
+from goldie.isolation import clone_tree
+from goldie.tests import write_file
+
+
+class TestCloneTree(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "fixture")
+        write_file(self.source, "a.txt", "a")
+        write_file(self.source, "sub/b.txt", "b")
+        write_file(self.source, "work/c.txt", "c")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_copy(self):
+        target = os.path.join(self.directory.name, "target")
+        clone_tree(self.source, target, goldie.CloneMode.COPY, exclude=os.path.join(self.source, "work"))
+        self.assertEqual(sorted(os.listdir(target)), ["a.txt", "sub"])
+        write_file(target, "sub/b.txt", "changed")
+        with open(os.path.join(self.source, "sub", "b.txt")) as f:
+            self.assertEqual(f.read(), "b")
+
+    def test_hardlink_fallback(self):
+        target = os.path.join(self.directory.name, "target")
+        with mock.patch.object(isolation, "_reflink", return_value=False):
+            clone_tree(self.source, target, goldie.CloneMode.HARDLINK)
+        self.assertTrue(os.path.samefile(os.path.join(self.source, "a.txt"), os.path.join(target, "a.txt")))
+
+
+@unittest.skipIf(sys.platform == "win32", "requires sh")
+class TestIsolatedRun(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        write_file(self.root, "fixture/header.txt", "header\n")
+        self.input_file = write_file(self.root, "input.txt", "body\n")
+        write_file(self.root, "input.txt.golden", "header\nbody\n")
+        self.configuration = goldie.ConfigFileTest(
+            run_configuration=goldie.ConfigRun(
+                # Writes a scratch file to its working directory
+                cmd="sh",
+                args=["-c", 'cat header.txt "$0" > scratch.txt && cat scratch.txt', "{input}"],
+                isolation=goldie.ConfigIsolation(fixture="fixture"),
+            ),
+            comparison_configuration=goldie.ConfigComparison(),
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _working_directories(self) -> list[str]:
+        isolation._CLEANUP_QUEUE.join()
+        return os.listdir(os.path.join(self.root, ".goldie", "work"))
+
+    def test_cleanup(self):
+        goldie.run_file_unittest(self, goldie.TestDefinition(self.input_file), self.configuration, self.root)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "fixture", "scratch.txt")))
+        self.assertEqual(self._working_directories(), [])
+
+    def test_keep_on_failure(self):
+        write_file(self.root, "input.txt.golden", "other\n")
+        with mock.patch("sys.stderr"), self.assertRaises(AssertionError):
+            goldie.run_file_unittest(self, goldie.TestDefinition(self.input_file), self.configuration, self.root)
+        (kept,) = self._working_directories()
+        self.assertTrue(kept.startswith("input.txt-"))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.root, ".goldie", "work", kept))), ["header.txt", "scratch.txt"]
+        )
+
+    def test_repetitions(self):
+        # Lists each working directory before writing the scratch file
+        log_file = os.path.join(self.root, "log.txt")
+        self.configuration.run_configuration.args[1] = 'ls >> "$1" && ' + self.configuration.run_configuration.args[1]
+        self.configuration.run_configuration.args.append(log_file)
+        self.configuration.run_validation_configuration.max_duration = 60
+        self.configuration.run_validation_configuration.repetitions = 3
+        goldie.run_file_unittest(self, goldie.TestDefinition(self.input_file), self.configuration, self.root)
+        with open(log_file) as f:
+            self.assertEqual(f.read(), "header.txt\n" * 3)
+        self.assertEqual(self._working_directories(), [])
+
+    def test_entry_point(self):
+        write_file(
+            self.root,
+            "fixture/isolated_module.py",
+            "def run(stdin, stdout, args):\n    stdout.write('header\\nbody\\n')\n",
+        )
+        self.addCleanup(sys.modules.pop, "isolated_module", None)
+        fixture = os.path.join(self.root, "fixture")
+        self.addCleanup(lambda: fixture in sys.path and sys.path.remove(fixture))
+        self.configuration.run_configuration = goldie.ConfigRun(
+            func="isolated_module:run", isolation=goldie.ConfigIsolation(fixture="fixture")
+        )
+        path = list(sys.path)
+        for _ in range(2):
+            goldie.run_file_unittest(self, goldie.TestDefinition(self.input_file), self.configuration, self.root)
+
+        # The module is imported from the fixture instead of the temporary working directories
+        self.assertEqual([p for p in sys.path if p not in path], [fixture])
@@ -0,0 +1,20 @@
+import unittest
+
+import goldie
+import goldie.performance
+
+
+class TestBudgets(unittest.TestCase):
+    def test_check_budgets(self):
+        results = [goldie.ExecutionResult(exit_code=0, duration=d, peak_memory=100 * 1024**2) for d in [1, 2, 9]]
+        config = goldie.ConfigRunValidation(max_duration=3, max_duration_ratio=1.5, max_peak_memory_ratio=2)
+        baseline = goldie.performance.Baseline(duration=1.0, peak_memory=80 * 1024**2)
+
+        failures = goldie.performance.check_budgets(results, config, baseline)
+        self.assertEqual(
+            failures,
+            ["Duration budget exceeded: p50 of 3 run(s) is 2.000s, budget is 1.500s (1.5x baseline of 1.000s)."],
+        )
+        self.assertEqual(
+            goldie.performance.check_budgets(results, config, None)[0][:30], "No performance baseline found,"
+        )
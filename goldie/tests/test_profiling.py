@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import goldie
+from goldie.profiling import capture_profile, should_profile
+
+
+def _work(stdin, stdout, args):
+    stdout.write(str(sum(i * i for i in range(10000))))
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.input_file = os.path.join(self.root, "input.txt")
+        with open(self.input_file, "w") as f:
+            f.write("hello\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_should_profile(self):
+        config = goldie.ConfigProfile(min_duration=1.0)
+        self.assertTrue(should_profile(config, False, goldie.ExecutionResult(exit_code=1, duration=0.1)))
+        self.assertTrue(should_profile(config, True, goldie.ExecutionResult(exit_code=0, duration=2.0)))
+        self.assertFalse(should_profile(config, True, goldie.ExecutionResult(exit_code=0, duration=0.1)))
+        self.assertFalse(should_profile(None, False, goldie.ExecutionResult(exit_code=1, duration=0.1)))
+        self.assertFalse(should_profile(config, False, None))
+
+    def test_python_command(self):
+        with open(os.path.join(self.root, "work.py"), "w") as f:
+            f.write("def hot():\n    return sum(range(1000))\n\nhot()\n")
+        config = goldie.ConfigRun(cmd=sys.executable, args=["work.py"], profile=goldie.ConfigProfile())
+
+        message = capture_profile(self.input_file, self.root, config, duration=1.5)
+        self.assertIn("(took 1.500s) written to", message)
+        self.assertIn("work.py:1(hot)", message)
+        profiles = os.path.join(self.root, ".goldie", "profiles")
+        self.assertEqual(len(os.listdir(profiles)), 1)
+
+    def test_callable(self):
+        config = goldie.ConfigRun(func=_work, isolate=True, profile=goldie.ConfigProfile(top=5))
+        message = capture_profile(self.input_file, self.root, config)
+        self.assertIn("_work", message)
+        self.assertTrue(message.split(" written to ")[1].split(":")[0].endswith("input.txt.prof"))
+
+    @unittest.skipIf(sys.platform == "win32", "requires sh")
+    def test_wrapper(self):
+        config = goldie.ConfigRun(
+            cmd="true",
+            profile=goldie.ConfigProfile(
+                wrapper=["sh", "-c", 'echo hot_function > "$0" && exec "$@"', "{profile}"],
+                report=["cat", "{profile}"],
+            ),
+        )
+        message = capture_profile(self.input_file, self.root, config)
+        self.assertTrue(message.endswith(".data:\nhot_function"), message)
+
+        config.profile = goldie.ConfigProfile()
+        self.assertIn("no profiler wrapper configured", capture_profile(self.input_file, self.root, config))
@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import goldie
+import goldie.tabular
+
+ACTUAL = """id,name,price,updated
+2,b,2.0001,monday
+1,a,1.5,tuesday
+3,c,3.0,monday
+"""
+
+EXPECTED = """id,name,price,updated
+1,a,1.0,sunday
+2,b,2.0,sunday
+4,d,4.0,sunday
+"""
+
+
+class TestCompareCsv(unittest.TestCase):
+    def _differences(self, config: goldie.ConfigCompareCsv) -> list[tuple[str, str]]:
+        differences = goldie.iter_csv_differences(io.StringIO(ACTUAL), io.StringIO(EXPECTED), config)
+        return sorted((d.location, d.message) for d in differences)
+
+    def test_keyed(self):
+        config = goldie.ConfigCompareCsv(
+            key_columns=["id"],
+            ignore_columns=["updated"],
+            tolerances=[goldie.CsvTolerance(column="price", absolute=0.001)],
+        )
+        expected = [
+            ("row=1,col=price", "Difference beyond tolerance."),
+            ("row=3", "Additional row."),
+            ("row=4", "Missing row."),
+        ]
+        self.assertEqual(self._differences(config), expected)
+        # The pure Python fallback yields the same result
+        with mock.patch.object(goldie.tabular, "np", None):
+            self.assertEqual(self._differences(config), expected)
+
+    def test_missing_key_column(self):
+        config = goldie.ConfigCompareCsv(key_columns=["id"])
+        actual = io.StringIO("name,price\na,1.0\n")
+        differences = list(goldie.iter_csv_differences(actual, io.StringIO(EXPECTED), config))
+        self.assertEqual(
+            [(d.location, d.message) for d in differences],
+            [("col=id", "Missing column."), ("col=updated", "Missing column.")],
+        )
+
+        config = goldie.ConfigCompareCsv(key_columns=["key"])
+        differences = list(goldie.iter_csv_differences(io.StringIO(ACTUAL), io.StringIO(EXPECTED), config))
+        self.assertEqual([(d.location, d.message) for d in differences], [("col=key", "Missing key column.")])
+
+    def test_ignore_row_order(self):
+        config = goldie.ConfigCompareCsv(
+            ignore_row_order=True,
+            ignore_columns=["updated"],
+            tolerances=[goldie.CsvTolerance(column="price", absolute=0.001)],
+        )
+        actual = "id,name,price,updated\n2,b,2.0001,x\n1,a,1.0,x\n4,e,4.0,x\n5,f,5.0,x\n"
+        differences = goldie.iter_csv_differences(io.StringIO(actual), io.StringIO(EXPECTED), config)
+        self.assertEqual(
+            [(d.location, d.message, d.expected, d.actual) for d in differences],
+            [
+                ("row=3", "Additional row.", "", "3"),
+                ("row=2,col=name", "Difference in value.", "d", "e"),
+            ],
+        )
+
+    def test_ragged_rows(self):
+        config = goldie.ConfigCompareCsv()
+        for actual, expected, differences in [
+            ("a,b\n1,2,3\n", "a,b\n1,2\n", [("row=0,col=2", "Additional cell.", "", "3")]),
+            ("a,b\n1,2\n", "a,b\n1,2,3\n", [("row=0,col=2", "Missing cell.", "3", "")]),
+            ("a,b\n1,2,3\n", "a,b\n1,2,4\n", [("row=0,col=2", "Difference in value.", "4", "3")]),
+            ("a,b\n1\n", "a,b\n1,\n", [("row=0,col=b", "Missing cell.", "", "")]),
+            ("a,b\n1,2,3\n", "a,b\n1,2,3\n", []),
+        ]:
+            with self.subTest(actual=actual, expected=expected):
+                result = goldie.iter_csv_differences(io.StringIO(actual), io.StringIO(expected), config)
+                self.assertEqual([(d.location, d.message, d.expected, d.actual) for d in result], differences)
+
+    def test_duplicate_columns(self):
+        table = "id,value,value\n1,2,3\n"
+        differences = goldie.iter_csv_differences(io.StringIO(table), io.StringIO(table), goldie.ConfigCompareCsv())
+        self.assertEqual(
+            [(d.location, d.message) for d in differences],
+            [("col=value", "Duplicate column."), ("col=value", "Duplicate column.")],
+        )
+
+    def test_positional(self):
+        config = goldie.ConfigCompareCsv(ignore_columns=["updated", "price"])
+        self.assertEqual(
+            self._differences(config),
+            [
+                ("row=0,col=id", "Difference in value."),
+                ("row=0,col=name", "Difference in value."),
+                ("row=1,col=id", "Difference in value."),
+                ("row=1,col=name", "Difference in value."),
+                ("row=2,col=id", "Difference in value."),
+                ("row=2,col=name", "Difference in value."),
+            ],
+        )
+
+    def test_compare_summary(self):
+        config = goldie.ConfigComparison(
+            comparison_type=goldie.ComparisonType.CSV,
+            csv_comparison_config=goldie.ConfigCompareCsv(max_differences=1),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            actual_file = os.path.join(directory, "actual.csv")
+            expected_file = os.path.join(directory, "expected.csv")
+            for path, content in [(actual_file, ACTUAL), (expected_file, EXPECTED)]:
+                with open(path, "w") as f:
+                    f.write(content)
+            equal, message, differences = goldie.compare(actual_file, expected_file, config)
+        self.assertFalse(equal)
+        self.assertEqual(len(differences), 1)
+        self.assertIn("Showing 1 of 12 differences", message)
+        self.assertIn("row=*,col=id: Difference in value. (3 occurrences)", message)
@@ -0,0 +1,101 @@
+import importlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import goldie
+from goldie.tests import write_file
+from goldie.watch import Watcher
+
+
+def _upper(stdin, stdout, args):
+    stdout.write(stdin.read().upper())
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        for name in ["a", "b"]:
+            write_file(self.root, f"{name}.txt", f"{name}\n")
+            write_file(self.root, f"{name}.txt.golden", f"{name.upper()}\n")
+        write_file(self.root, "dependency.py", "")
+        self.configuration = goldie.ConfigDirectoryTest(
+            file_filter="*.txt",
+            watch_paths=["*.py"],
+            config_file_test=goldie.ConfigFileTest(
+                run_configuration=goldie.ConfigRun(
+                    func=_upper,
+                    input_mode=goldie.InputMode.STDIN,
+                    output_mode=goldie.OutputMode.STDOUT,
+                ),
+                comparison_configuration=goldie.ConfigComparison(),
+            ),
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rerun_affected(self):
+        watcher = Watcher(self.configuration, self.root, stream=io.StringIO())
+
+        result = watcher.poll()
+        self.assertEqual(result.testsRun, 2)
+        self.assertTrue(result.wasSuccessful())
+        self.assertIsNone(watcher.poll())
+
+        # Only the test of the changed input is rerun
+        write_file(self.root, "a.txt", "changed\n")
+        result = watcher.poll()
+        self.assertEqual(result.testsRun, 1)
+        self.assertFalse(result.wasSuccessful())
+
+        # Changed dependencies rerun all tests
+        write_file(self.root, "dependency.py", "# changed\n")
+        self.assertEqual(watcher.poll().testsRun, 2)
+
+    def test_interactive_accept(self):
+        watcher = Watcher(self.configuration, self.root, interactive=True, stream=io.StringIO())
+        watcher.poll()
+
+        write_file(self.root, "b.txt", "new\n")
+        with mock.patch("builtins.input", return_value="y"):
+            result = watcher.poll()
+        self.assertFalse(result.wasSuccessful())
+        with open(os.path.join(self.root, "b.txt.golden")) as f:
+            self.assertEqual(f.read(), "NEW\n")
+        self.assertIsNone(watcher.poll())
+
+    def test_reload_callable(self):
+        write_file(
+            self.root, "watched_module.py", "def run(stdin, stdout, args):\n    stdout.write(stdin.read().upper())\n"
+        )
+        sys.path.insert(0, self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        self.addCleanup(sys.modules.pop, "watched_module", None)
+        self.addCleanup(goldie.execution.reset_worker_pool)
+        module = importlib.import_module("watched_module")
+
+        # Isolated entry points run in the worker, functions in-process
+        for func, isolate in [("watched_module:run", True), (module.run, False)]:
+            with self.subTest(isolate=isolate):
+                write_file(
+                    self.root,
+                    "watched_module.py",
+                    "def run(stdin, stdout, args):\n    stdout.write(stdin.read().upper())\n",
+                )
+                self.configuration.config_file_test.run_configuration.func = func
+                self.configuration.config_file_test.run_configuration.isolate = isolate
+                watcher = Watcher(self.configuration, self.root, stream=io.StringIO())
+                self.assertTrue(watcher.poll().wasSuccessful())
+
+                # The changed code is picked up
+                write_file(
+                    self.root, "watched_module.py", "def run(stdin, stdout, args):\n    stdout.write(stdin.read())\n"
+                )
+                result = watcher.poll()
+                self.assertEqual(result.testsRun, 2)
+                self.assertFalse(result.wasSuccessful())
@@ -0,0 +1,307 @@
+import dataclasses
+import importlib
+import os
+import sys
+import time
+import unittest
+from typing import Any, TextIO
+
+from .discovery import GOLDEN_BASELINE_SUFFIX, GOLDEN_DIRECTORY_SUFFIX, GOLDEN_SUFFIX, discover
+from .execution import reset_worker_pool, resolve_entry_point
+from .testing import ConfigDirectoryTest, TestDefinition, discover_tests, run_file_unittest
+
+
+def load_configuration(entry_point: str, directory: str = None) -> tuple[ConfigDirectoryTest, str]:
+    """
+    Loads a directory test configuration from a 'module:attribute' entry point.
+
+    Parameters
+    ----------
+    entry_point : str
+        The entry point. The attribute is either a ConfigDirectoryTest or a function returning one.
+    directory : str, optional
+        The directory to import the module from (added to sys.path).
+
+    Returns
+    -------
+    tuple[ConfigDirectoryTest, str]
+        The configuration and the file of the module.
+    """
+    result = resolve_entry_point(entry_point, directory)
+    if callable(result):
+        result = result()
+    if not isinstance(result, ConfigDirectoryTest):
+        raise TypeError(f"Entry point '{entry_point}' is not a ConfigDirectoryTest.")
+    return result, os.path.abspath(sys.modules[entry_point.partition(":")[0]].__file__)
+
+
+def _stat(path: str) -> tuple[int, int]:
+    """
+    Returns the modification time and size of a file (None if it does not exist).
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _reload_modules(paths: set[str]) -> set[str]:
+    """
+    Reloads the imported modules defined by the given files, so in-process callables pick up changes.
+
+    Returns
+    -------
+    set[str]
+        The names of the reloaded modules.
+    """
+    reloaded = set()
+    for module in list(sys.modules.values()):
+        file = getattr(module, "__file__", None)
+        if file and os.path.abspath(file) in paths:
+            importlib.reload(module)
+            reloaded.add(module.__name__)
+    return reloaded
+
+
+def _reloaded_callable(func: Any, modules: set[str]) -> Any:
+    """
+    Looks up a callable again in its module if the module was reloaded (entry points are returned as is).
+    """
+    if not callable(func) or getattr(func, "__module__", None) not in modules:
+        return func
+    result = sys.modules[func.__module__]
+    try:
+        for name in func.__qualname__.split("."):
+            result = getattr(result, name)
+    except AttributeError:
+        # E.g., nested functions, which cannot be looked up
+        return func
+    return result
+
+
+class _GoldenTest(unittest.TestCase):
+    """A golden file test of a single input file."""
+
+    def __init__(self, td: TestDefinition, watcher: "Watcher", update: bool = False):
+        super().__init__("run_golden")
+        self.td = td
+        self.watcher = watcher
+        self.update = update
+
+    def run_golden(self):
+        run_file_unittest(
+            self,
+            self.td,
+            self.watcher.configuration.config_file_test,
+            root_directory=self.watcher.root_directory,
+            update=self.update,
+        )
+
+    def id(self) -> str:
+        root_directory = self.watcher.root_directory
+        return os.path.relpath(os.path.join(root_directory, self.td.input_file), root_directory)
+
+    def __str__(self) -> str:
+        return self.id()
+
+
+class Watcher:
+    """
+    Watches the input files, golden files and dependencies of a directory test and reruns the affected tests.
+    State is kept warm between runs: the configuration, imported modules (e.g., of in-process callables), the worker
+    pool of isolated callables (restarted when dependencies change) and the discovery listings.
+    """
+
+    def __init__(
+        self,
+        configuration: ConfigDirectoryTest,
+        root_directory: str,
+        interactive: bool = False,
+        stream: TextIO = None,
+        configuration_entry_point: str = None,
+    ):
+        """
+        Parameters
+        ----------
+        configuration : ConfigDirectoryTest
+            The configuration of the directory test.
+        root_directory : str
+            The directory the file filters are relative to.
+        interactive : bool, optional
+            Whether to offer accepting the output of failed tests as new golden files.
+        stream : TextIO, optional
+            The stream to report to, by default stderr.
+        configuration_entry_point : str, optional
+            The 'module:attribute' entry point the configuration was loaded from. The module is watched as well and
+            reloaded when it changes.
+        """
+        self.configuration = configuration
+        self.root_directory = os.path.abspath(root_directory)
+        self.interactive = interactive
+        self.stream = stream or sys.stderr
+        self.configuration_entry_point = configuration_entry_point
+        self.configuration_file = None
+        if configuration_entry_point:
+            self.configuration_file = os.path.abspath(sys.modules[configuration_entry_point.partition(":")[0]].__file__)
+        self.tests = {}
+        self.snapshot = {}
+        self.test_listings = {}
+        self.dependency_listings = {}
+
+    def _scan(self) -> tuple[dict[str, tuple[int, int]], dict[str, str]]:
+        """
+        Takes a snapshot of all watched files.
+
+        Returns
+        -------
+        tuple[dict[str, tuple[int, int]], dict[str, str]]
+            The modification time and size per watched file and the input file of the test each file belongs to
+            (None for dependencies affecting all tests).
+        """
+        _, test_files = discover_tests(self.configuration, self.root_directory, self.test_listings)
+        self.tests = {td.input_file: td for td in test_files}
+
+        owners = {}
+        for input_file in self.tests:
+            path = os.path.join(self.root_directory, input_file)
+            owners[path] = input_file
+            owners[path + GOLDEN_SUFFIX] = input_file
+            owners[path + GOLDEN_BASELINE_SUFFIX] = input_file
+            for dirpath, _, filenames in os.walk(path + GOLDEN_DIRECTORY_SUFFIX):
+                for filename in filenames:
+                    owners[os.path.join(dirpath, filename)] = input_file
+        if self.configuration.watch_paths:
+            dependencies = discover(
+                self.root_directory, include=self.configuration.watch_paths, cache=self.dependency_listings
+            )
+            for dependency in dependencies.input_files:
+                owners[dependency] = None
+        if self.configuration_file:
+            owners[self.configuration_file] = None
+
+        snapshot = {}
+        for path in owners:
+            stat = _stat(path)
+            if stat is not None:
+                snapshot[path] = stat
+        return snapshot, owners
+
+    def _changes(self) -> tuple[list[TestDefinition], set[str]]:
+        """
+        Determines the tests affected by changes since the last snapshot.
+
+        Returns
+        -------
+        tuple[list[TestDefinition], set[str]]
+            The affected tests and the changed dependencies.
+        """
+        snapshot, owners = self._scan()
+        changed = {
+            path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+
+        dependencies = {path for path in changed if owners.get(path, "") is None}
+        if dependencies:
+            return list(self.tests.values()), dependencies
+        affected = {owners[path] for path in changed if owners.get(path) in self.tests}
+        return [td for input_file, td in self.tests.items() if input_file in affected], dependencies
+
+    def _reload_callable(self, modules: set[str]):
+        """
+        Replaces the callable of the run configuration by its reloaded version, if its module was reloaded.
+        """
+        file_test = self.configuration.config_file_test
+        func = _reloaded_callable(file_test.run_configuration.func, modules)
+        if func is not file_test.run_configuration.func:
+            run_configuration = dataclasses.replace(file_test.run_configuration, func=func)
+            file_test = dataclasses.replace(file_test, run_configuration=run_configuration)
+            self.configuration = dataclasses.replace(self.configuration, config_file_test=file_test)
+
+    def run(self, tests: list[TestDefinition], update: bool = False) -> unittest.TestResult:
+        """
+        Runs the given tests and reports the outcome.
+
+        Parameters
+        ----------
+        tests : list[TestDefinition]
+            The tests to run.
+        update : bool, optional
+            Whether to update the golden files instead of comparing against them.
+
+        Returns
+        -------
+        unittest.TestResult
+            The result of the tests.
+        """
+        suite = unittest.TestSuite(_GoldenTest(td, self, update) for td in tests)
+        return unittest.TextTestRunner(stream=self.stream, verbosity=2 if len(tests) <= 10 else 1).run(suite)
+
+    def _accept(self, result: unittest.TestResult) -> bool:
+        """
+        Asks whether to accept the output of each failed test as its new golden file.
+
+        Returns
+        -------
+        bool
+            Whether any golden file was updated.
+        """
+        accepted = []
+        for test, _ in result.failures + result.errors:
+            if isinstance(test, _GoldenTest):
+                answer = input(f"Accept new golden file for {test}? [y/N] ")
+                if answer.strip().lower() in ["y", "yes"]:
+                    accepted.append(test.td)
+        if accepted:
+            self.run(accepted, update=True)
+        return bool(accepted)
+
+    def poll(self) -> unittest.TestResult:
+        """
+        Reruns the tests affected by changes since the last poll.
+
+        Returns
+        -------
+        unittest.TestResult
+            The result of the rerun tests (None if nothing changed).
+        """
+        initial = not self.snapshot
+        tests, dependencies = self._changes()
+        if not initial and self.configuration_file in dependencies:
+            # Reload the configuration itself, which may change the set of tests
+            importlib.reload(sys.modules[self.configuration_entry_point.partition(":")[0]])
+            self.configuration, _ = load_configuration(self.configuration_entry_point)
+            self.snapshot, _ = self._scan()
+            tests = list(self.tests.values())
+        if not initial and dependencies:
+            reloaded = _reload_modules(dependencies - {self.configuration_file})
+            self._reload_callable(reloaded)
+            # The worker of isolated callables still runs the old code
+            reset_worker_pool()
+        if not tests:
+            return None
+
+        result = self.run(tests)
+        if self.interactive and not result.wasSuccessful() and self._accept(result):
+            # Do not rerun the tests for golden files updated by ourselves
+            self.snapshot, _ = self._scan()
+        return result
+
+    def watch(self, interval: float = 0.2):
+        """
+        Runs all tests and then keeps rerunning the affected tests on changes until interrupted.
+
+        Parameters
+        ----------
+        interval : float, optional
+            The polling interval in seconds, by default 0.2.
+        """
+        try:
+            while True:
+                if self.poll() is not None:
+                    self.stream.write(f"Watching {self.root_directory} for changes (Ctrl+C to stop)...\n")
+                    self.stream.flush()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass